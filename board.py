@@ -0,0 +1,106 @@
+from trackers import BARS, BAR_WIDTH
+
+# PROGRESS BOARD
+# The text of the #progress-tracker board: a bar per project, a section per
+# member, the weekly leaderboard, and the page layout that keeps each
+# member's section in the same message as the board grows and shrinks.
+
+MESSAGE_LIMIT = 2000
+LEADERBOARD_SIZE = 10
+
+
+def progress_bar(current_wc, goal_wc):
+    try:
+        percent = round(current_wc / goal_wc * 100)
+    except (ValueError, ZeroDivisionError):
+        percent = 0
+    filled = percent // 10
+    return BARS[BAR_WIDTH if filled > BAR_WIDTH else 0 if filled < 0 else filled], percent
+
+
+def render_user_section(user_id, projects):
+    """projects is a list of (title, stage, current_wc, goal_wc)."""
+    lines = [f"**<@{user_id}>**"]
+    for title, stage, current_wc, goal_wc in projects:
+        bar, percent = progress_bar(current_wc, goal_wc)
+        lines.append(f"_{title}_ ({stage})\n`{bar}` {percent}% · {current_wc:,} / {goal_wc:,} words")
+    return "\n".join(lines)
+
+
+def render_leaderboard(weekly_words):
+    """weekly_words is {user_id: words written this week}."""
+    ranked = sorted(
+        ((words, user_id) for user_id, words in weekly_words.items() if words > 0), reverse=True
+    )[:LEADERBOARD_SIZE]
+    lines = ["🏆 **This week's word count leaderboard**"]
+    if not ranked:
+        lines.append("_No words logged yet this week. The page is waiting._")
+    for place, (words, user_id) in enumerate(ranked, start=1):
+        lines.append(f"{place}. <@{user_id}> — {words:,} words")
+    return "\n".join(lines)
+
+
+def paginate(blocks, limit=MESSAGE_LIMIT, separator="\n\n"):
+    """Packs blocks into as few messages as possible, each under the message limit."""
+    pages = []
+    current = ""
+    for block in blocks:
+        while len(block) > limit:
+            if current:
+                pages.append(current)
+                current = ""
+            pages.append(block[:limit])
+            block = block[limit:]
+        if not current:
+            current = block
+        elif len(current) + len(separator) + len(block) <= limit:
+            current += separator + block
+        else:
+            pages.append(current)
+            current = block
+    if current:
+        pages.append(current)
+    return pages
+
+
+def _page_size(page, sections, separator):
+    return sum(len(sections[uid]) for uid in page) + len(separator) * (len(page) - 1)
+
+
+def layout_sections(pages, sections, limit=MESSAGE_LIMIT, separator="\n\n"):
+    """Fits {user_id: section} onto pages, a list of [user_id] per message, updated in place; returns each page's text.
+
+    Sections keep the page they were first placed on, so a change to one
+    member's section only changes that page. New members go on the last
+    page, or a new one at the end; a page that outgrows the limit moves its
+    last members there; and a page left empty takes the last page's members.
+    """
+    sections = {
+        uid: text if len(text) <= limit else text[:limit - 1] + "…"
+        for uid, text in sections.items()
+    }
+    placed = set()
+    for page in pages:
+        page[:] = [uid for uid in page if uid in sections]
+        placed.update(page)
+    i = 0
+    while i < len(pages):
+        if pages[i]:
+            i += 1
+            continue
+        last = pages.pop()
+        if i < len(pages):
+            pages[i] = last
+
+    moving = []
+    for page in pages:
+        while len(page) > 1 and _page_size(page, sections, separator) > limit:
+            moving.append(page.pop())
+    moving.reverse()
+    moving += sorted(uid for uid in sections if uid not in placed)
+    for uid in moving:
+        if pages and _page_size(pages[-1] + [uid], sections, separator) <= limit:
+            pages[-1].append(uid)
+        else:
+            pages.append([uid])
+    return [separator.join(sections[uid] for uid in page) for page in pages]
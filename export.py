@@ -0,0 +1,132 @@
+import csv
+import gzip
+import io
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+# DATA EXPORT
+# Parses !export's options and writes the store's history rows to CSV, JSON
+# Lines or gzipped JSON files, starting a new file whenever one nears the
+# upload limit so each can be sent as its own attachment. Called from a
+# worker thread, with progress and cancellation shared through plain objects.
+
+FORMATS = {"csv": ".csv", "jsonl": ".jsonl", "json.gz": ".json.gz"}
+COLUMNS = ("guild_id", "user_id", "channel_id", "title", "genre", "goal_wc", "ts", "time", "word_count", "stage")
+USAGE = (
+    "`!export [csv|jsonl|json.gz] [user:@member] [from:YYYY-MM-DD] [to:YYYY-MM-DD] [guild:ID]`\n"
+    "Dates are UTC and inclusive; the default is every project in this server, as CSV."
+)
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def parse_options(options):
+    """Parses !export's arguments into (format, {"guild_id", "user_id", "since", "until"}).
+
+    Raises ValueError with a message for the user if an option doesn't parse.
+    """
+    fmt = "csv"
+    filters = {"guild_id": None, "user_id": None, "since": None, "until": None}
+    for option in options:
+        key, _, value = option.partition(":")
+        key = key.lower()
+        if not value and key in FORMATS:
+            fmt = key
+        elif key == "user" and re.fullmatch(r"<@!?(\d+)>|(\d+)", value):
+            filters["user_id"] = int(re.sub(r"\D", "", value))
+        elif key == "guild" and value.isdigit():
+            filters["guild_id"] = int(value)
+        elif key in ("from", "to"):
+            try:
+                day = datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+            except ValueError:
+                raise ValueError(f"❌ `{option}` isn't a date like `{key}:2024-06-03`.") from None
+            if key == "from":
+                filters["since"] = int(day.timestamp())
+            else:
+                filters["until"] = int(day.timestamp()) + 86399
+        else:
+            raise ValueError(f"❌ I don't understand `{option}`. Try {USAGE}")
+    return fmt, filters
+
+
+def record(row):
+    """A history row from Store.export_rows as a dict in COLUMNS order, with a readable time."""
+    guild_id, user_id, channel_id, title, genre, goal_wc, ts, word_count, stage = row
+    time = datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts is not None else None
+    return dict(zip(COLUMNS, (guild_id, user_id, channel_id, title, genre, goal_wc, ts, time, word_count, stage)))
+
+
+class ChunkedWriter:
+    """Writes records to numbered files of one format, each kept under limit bytes.
+
+    on_chunk(path) is called with each file once it is complete.
+    """
+
+    def __init__(self, fmt, directory, basename, limit, on_chunk):
+        self.fmt = fmt
+        self.directory = directory
+        self.basename = basename
+        self.limit = limit
+        self.on_chunk = on_chunk
+        self.parts = 0
+        self.raw = None
+
+    def _open(self):
+        self.parts += 1
+        self.path = os.path.join(self.directory, f"{self.basename}-part{self.parts}{FORMATS[self.fmt]}")
+        self.raw = open(self.path, "wb")
+        self.count = 0
+        stream = gzip.GzipFile(fileobj=self.raw, mode="wb", compresslevel=6) if self.fmt == "json.gz" else self.raw
+        self.out = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        if self.fmt == "csv":
+            self.csv = csv.writer(self.out)
+            self.csv.writerow(COLUMNS)
+        elif self.fmt == "json.gz":
+            self.out.write("[")
+
+    def write(self, row):
+        if self.raw is None:
+            self._open()
+        if self.fmt == "csv":
+            self.csv.writerow(record(row).values())
+        elif self.fmt == "jsonl":
+            self.out.write(json.dumps(record(row), ensure_ascii=False) + "\n")
+        else:
+            self.out.write((",\n" if self.count else "\n") + json.dumps(record(row), ensure_ascii=False))
+        self.count += 1
+        # Text and gzip buffers hold a little back from the file, hence the margin
+        if self.raw.tell() >= self.limit * 0.9:
+            self.close()
+
+    def close(self):
+        if self.raw is None:
+            return
+        if self.fmt == "json.gz":
+            self.out.write("\n]\n")
+        self.out.close()  # flushes into the gzip stream, and finishes it
+        self.raw.close()
+        self.raw = None
+        self.on_chunk(self.path)
+
+
+def write_export(rows, fmt, directory, basename, limit, on_chunk, progress, cancelled):
+    """Streams rows into upload-sized files; returns how many records were written.
+
+    progress["records"] is kept current for the caller to report, and the
+    export stops with ExportCancelled once the cancelled event is set.
+    """
+    writer = ChunkedWriter(fmt, directory, basename, limit, on_chunk)
+    try:
+        for row in rows:
+            writer.write(row)
+            progress["records"] += 1
+            if progress["records"] % 1000 == 0 and cancelled.is_set():
+                raise ExportCancelled()
+    finally:
+        writer.close()
+    return progress["records"]
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+import pytz
+
+from board import MESSAGE_LIMIT
+
+# WEEKLY GOALS
+# Which week a logged goal counts towards, how a goal is quoted, and how a
+# channel's queued goals are packed into as few #weekly-writing-goals
+# digest messages as the length limit allows.
+
+GOAL_TZ = pytz.timezone("Australia/Sydney")
+TRUNCATED = "…"
+
+
+def goal_week(ts):
+    """ISO date of the Monday starting the week a goal sent at unix time ts is for.
+
+    The prompt goes out on Sunday afternoon, so Sunday's replies count
+    towards the week that starts the next day.
+    """
+    day = datetime.fromtimestamp(ts, GOAL_TZ).date() + timedelta(days=1)
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+def render_goal(author, ts, content, limit=MESSAGE_LIMIT):
+    """One relayed goal, quoted, cut short if it wouldn't fit in a message on its own."""
+    when = datetime.fromtimestamp(ts, GOAL_TZ).strftime("%d %B %Y")
+    header = f"📝 __**{author}'s Weekly Goal**__ ({when}):"
+    quoted = "\n".join(f"> {line}" for line in content.splitlines() or [""])
+    text = f"{header}\n{quoted}"
+    return text if len(text) <= limit else text[:limit - len(TRUNCATED)] + TRUNCATED
+
+
+def digest_pages(goals, limit=MESSAGE_LIMIT):
+    """Packs [(goal_id, author, ts, content)] into [(message, [goal_id])], each message under the limit."""
+    pages = []
+    text, ids = "", []
+    for goal_id, author, ts, content in goals:
+        block = render_goal(author, ts, content, limit)
+        if text and len(text) + 2 + len(block) <= limit:
+            text += "\n\n" + block
+            ids.append(goal_id)
+            continue
+        if text:
+            pages.append((text, ids))
+        text, ids = block, [goal_id]
+    if text:
+        pages.append((text, ids))
+    return pages
@@ -0,0 +1,79 @@
+from array import array
+from bisect import bisect_right
+
+# PROJECT HISTORY
+# Word count samples per project, kept column-wise in typed arrays so a
+# project with years of updates stays a few kilobytes and range queries are
+# a binary search rather than a scan of Discord channel history.
+
+DAY = 86400
+
+
+class ProjectHistory:
+    """Append-only (timestamp, word count, stage) samples for one project, in time order."""
+
+    __slots__ = ("times", "counts", "stages")
+
+    def __init__(self):
+        self.times = array("q")  # unix seconds, UTC
+        self.counts = array("q")
+        self.stages = []
+
+    @classmethod
+    def from_columns(cls, times, counts, stages):
+        """Wraps columns that are already in time order, e.g. read back from a snapshot."""
+        history = cls.__new__(cls)
+        history.times = times
+        history.counts = counts
+        history.stages = stages
+        return history
+
+    def __len__(self):
+        return len(self.times)
+
+    def append(self, ts, word_count, stage):
+        if self.times and ts < self.times[-1]:
+            ts = self.times[-1]  # keep the arrays sorted if the clock steps back
+        self.times.append(ts)
+        self.counts.append(word_count)
+        self.stages.append(stage)
+
+    @property
+    def latest_word_count(self):
+        return self.counts[-1] if self.counts else None
+
+    @property
+    def latest_stage(self):
+        return self.stages[-1] if self.stages else None
+
+    def word_count_at(self, ts):
+        """Word count as of ts, or None if the project had no samples yet."""
+        i = bisect_right(self.times, ts)
+        return self.counts[i - 1] if i else None
+
+    def words_between(self, start, end):
+        """Words added between start and end; a project started in the range counts from its first sample."""
+        if not self.times:
+            return 0
+        end_wc = self.word_count_at(end)
+        if end_wc is None:
+            return 0
+        start_wc = self.word_count_at(start)
+        if start_wc is None:
+            start_wc = self.counts[0]
+        return max(end_wc - start_wc, 0)
+
+    def streak(self, now):
+        """Consecutive UTC days, ending today or yesterday, on which the word count went up."""
+        today = now // DAY
+        last_day = None
+        streak = 0
+        for i in range(len(self.times) - 1, 0, -1):
+            day = self.times[i] // DAY
+            if day < (today if last_day is None else last_day) - 1:
+                break
+            if day == last_day or self.counts[i] <= self.counts[i - 1]:
+                continue
+            streak += 1
+            last_day = day
+        return streak
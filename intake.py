@@ -0,0 +1,199 @@
+import json
+
+# DM INTAKE
+# The onboarding and !addproject dialogs as explicit state machines, and the
+# timer wheel that expires them. handle() applies one reply to a session and
+# returns the questions to ask next; main.py routes DMs to sessions,
+# persists them after every step and builds the den once one is ready.
+#
+# den:     name -> count -> project (once per project) -> confirm -> ready
+# project: project -> ready
+
+TIMEOUT = 300  # seconds to wait for each answer
+MAX_PROJECTS = 10
+
+WORD_TO_NUM = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10
+}
+PROJECT_FORMAT = "`Title, Genre, Current Word Count, Goal Word Count, Stage`"
+
+COUNT_PROMPT = "How many projects are you juggling?\n(Enter a number or a word between 1 and 10, e.g. `3` or `three`)"
+COUNT_ERROR = "❌ That wasn’t a valid number. Try again with something like `2` or `two`."
+CONFIRM_ERROR = "Just a `yes` or a `no`, please. Shall I build your den?"
+
+
+def parse_project_details(text):
+    """Returns ((title, genre, current_wc, goal_wc, stage), None) or (None, error message)."""
+    parts = [p.strip() for p in text.split(",")]
+    if len(parts) < 5:
+        return None, "❌ I need all five details. Try again."
+    try:
+        title, genre, current, goal, stage = parts
+        return (title, genre, int(current), int(goal), stage), None
+    except ValueError:
+        return None, "❌ Word counts must be numbers. Try again."
+
+
+def parse_count(text):
+    text = text.strip().lower()
+    count = int(text) if text.isdigit() else WORD_TO_NUM.get(text)
+    return count if count and count <= MAX_PROJECTS else None
+
+
+def project_prompt(number):
+    return (
+        f"📘 Project #{number}? Reply with: {PROJECT_FORMAT}\n"
+        "Please separate each with a comma, and don’t use spaces in numbers."
+    )
+
+
+def confirm_prompt(session):
+    lines = [f"📋 Here’s your den, {session.name}:"]
+    for title, genre, current_wc, goal_wc, stage in session.projects:
+        lines.append(f"• **{title}** ({genre}, {stage}) — {current_wc:,} / {goal_wc:,} words")
+    lines.append("Shall I build it? Reply `yes`, or `no` to start the projects over.")
+    return "\n".join(lines)
+
+
+class IntakeSession:
+    """One user's dialog: which question they're on and the answers so far."""
+
+    __slots__ = ("user_id", "guild_id", "kind", "state", "name", "count", "projects", "expires_at")
+
+    def __init__(self, user_id, guild_id, kind, state, name=None, count=None, projects=(), expires_at=0.0):
+        self.user_id = user_id
+        self.guild_id = guild_id
+        self.kind = kind
+        self.state = state
+        self.name = name
+        self.count = count
+        self.projects = list(projects)
+        self.expires_at = expires_at
+
+    def to_row(self):
+        data = {"name": self.name, "count": self.count, "projects": self.projects}
+        return self.user_id, self.guild_id, self.kind, self.state, json.dumps(data), self.expires_at
+
+    @classmethod
+    def from_row(cls, row):
+        user_id, guild_id, kind, state, data, expires_at = row
+        data = json.loads(data)
+        projects = [tuple(details) for details in data["projects"]]
+        return cls(user_id, guild_id, kind, state, data["name"], data["count"], projects, expires_at)
+
+
+def start(user_id, guild_id, kind, now):
+    """Opens a dialog and returns (session, messages to send)."""
+    if kind == "den":
+        session = IntakeSession(user_id, guild_id, kind, "name", expires_at=now + TIMEOUT)
+        return session, ["🐾 Well, well. Another writer in need of a cozy corner...", "What’s your name?"]
+    session = IntakeSession(user_id, guild_id, kind, "project", expires_at=now + TIMEOUT)
+    return session, [f"📦 Time to hatch a new project? I’m listening.\nReply with: {PROJECT_FORMAT}"]
+
+
+def handle(session, text, now):
+    """Applies one reply and returns the messages to send.
+
+    Afterwards session.state is the next question, "ready" once every answer
+    is in, or "closed" if the dialog ended without a result.
+    """
+    session.expires_at = now + TIMEOUT
+
+    if session.state == "name":
+        session.name = text.strip()
+        session.state = "count"
+        return [COUNT_PROMPT]
+
+    if session.state == "count":
+        count = parse_count(text)
+        if count is None:
+            return [COUNT_ERROR, COUNT_PROMPT]
+        session.count = count
+        session.projects = []
+        session.state = "project"
+        return [project_prompt(1)]
+
+    if session.state == "project":
+        details, error = parse_project_details(text)
+        if session.kind == "project":
+            session.state = "closed" if error else "ready"
+            if error:
+                return [f"{error} Run `!addproject` again with the format: {PROJECT_FORMAT}."]
+            session.projects = [details]
+            return []
+        if error:
+            return [error, project_prompt(len(session.projects) + 1)]
+        session.projects.append(details)
+        if len(session.projects) < session.count:
+            return [project_prompt(len(session.projects) + 1)]
+        session.state = "confirm"
+        return [confirm_prompt(session)]
+
+    if session.state == "confirm":
+        answer = text.strip().lower()
+        if answer in ("yes", "y"):
+            session.state = "ready"
+            return []
+        if answer in ("no", "n"):
+            session.projects = []
+            session.state = "count"
+            return ["No problem, let’s go again.", COUNT_PROMPT]
+        return [CONFIRM_ERROR]
+
+    return []
+
+
+class TimerWheel:
+    """Hashed timing wheel: O(1) schedule and cancel, and one periodic tick expires every timer.
+
+    Deadlines further out than one revolution stay in their slot until the
+    wheel comes round to them on a later lap.
+    """
+
+    __slots__ = ("tick", "slots", "deadlines", "position")
+
+    def __init__(self, tick=1.0, size=512):
+        self.tick = tick
+        self.slots = [set() for _ in range(size)]
+        self.deadlines = {}  # {key: deadline in ticks}
+        self.position = None  # last tick advanced to
+
+    def __len__(self):
+        return len(self.deadlines)
+
+    def schedule(self, key, deadline):
+        """(Re)schedules key for the unix time deadline."""
+        self.cancel(key)
+        at = int(deadline // self.tick)
+        if self.position is not None and at <= self.position:
+            at = self.position + 1  # already due; fire on the next tick
+        self.deadlines[key] = at
+        self.slots[at % len(self.slots)].add(key)
+
+    def clear(self):
+        for slot in self.slots:
+            slot.clear()
+        self.deadlines.clear()
+        self.position = None
+
+    def cancel(self, key):
+        at = self.deadlines.pop(key, None)
+        if at is not None:
+            self.slots[at % len(self.slots)].discard(key)
+
+    def advance(self, now):
+        """Moves the wheel to now and returns the keys that fell due."""
+        current = int(now // self.tick)
+        if self.position is None:
+            self.position = min([current + 1, *self.deadlines.values()]) - 1  # catch up on overdue timers
+        due = []
+        steps = min(current - self.position, len(self.slots))
+        for step in range(1, steps + 1):
+            slot = self.slots[(self.position + step) % len(self.slots)]
+            for key in [key for key in slot if self.deadlines[key] <= current]:
+                slot.discard(key)
+                del self.deadlines[key]
+                due.append(key)
+        self.position = max(self.position, current)
+        return due
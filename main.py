@@ -3,8 +3,27 @@ from discord.ext import commands, tasks
 import os
 from datetime import datetime, timedelta
 import pytz
-import re
 import json
+import asyncio
+import shutil
+import tempfile
+import threading
+import heapq
+import time
+from history import ProjectHistory
+from projects import Project, ProjectRegistry
+from projects import diff as diff_projects
+from store import Store
+from trackers import build_tracker, parse_tracker, parse_update
+import intake
+import goals
+from board import layout_sections, paginate, render_leaderboard, render_user_section
+import snapshot
+import export
+import metrics
+from metrics import timed
+
+PROCESS_STARTED = time.monotonic()
 
 # SETUP INTENTS
 intents = discord.Intents.default()
@@ -12,39 +31,400 @@ intents.members = True
 intents.messages = True
 intents.message_content = True
 
+# SHARDING
+# Without SHARD_COUNT the bot runs on a single gateway connection. With
+# SHARD_COUNT ("auto" or a number) it runs as an AutoShardedBot, and with
+# SHARD_IDS (e.g. "0-3" or "4,5") several processes can split the shards
+# between them, sharing one store. Each process loads, and runs its task
+# loops for, only the guilds on its own shards.
+def parse_shard_ids(text):
+    if not text:
+        return None
+    shard_ids = []
+    for part in text.split(","):
+        start, _, end = part.strip().partition("-")
+        shard_ids.extend(range(int(start), int(end or start) + 1))
+    return shard_ids
+
+SHARD_COUNT = os.getenv("SHARD_COUNT")
+SHARD_IDS = parse_shard_ids(os.getenv("SHARD_IDS"))
+SHARD_OWNER = os.getenv("SHARD_IDS") or "*"  # this process's name for work it claims in the shared store
+
 # CONFIGURE BOT
-bot = commands.Bot(command_prefix="!", intents=intents)
+# Member lists are fetched per guild when a feature needs them (see
+# ensure_members) rather than holding up startup
+if SHARD_COUNT:
+    bot = commands.AutoShardedBot(
+        command_prefix="!",
+        intents=intents,
+        chunk_guilds_at_startup=False,
+        shard_count=None if SHARD_COUNT == "auto" else int(SHARD_COUNT),
+        shard_ids=SHARD_IDS,
+    )
+else:
+    bot = commands.Bot(command_prefix="!", intents=intents, chunk_guilds_at_startup=False)
+
+def owned_shards():
+    """(shard_ids, shard_count) when this process serves only some shards, else None for every guild."""
+    if SHARD_IDS is None or not bot.shard_count:
+        return None
+    return SHARD_IDS, bot.shard_count
 
 # ADMIN ROLE
 ADMIN_ROLE_NAME = "Admin"
 
 # IN-MEMORY STORAGE
-user_projects = {}
-user_categories = {}
-user_goals = {}
-user_project_metadata = {}
-
-# UTIL: TRACKER BUILDER
-def build_tracker(name, genre, stage, current_wc, goal_wc):
+# Member state is partitioned by guild, so a writer's dens in two servers
+# never overwrite each other. Channel IDs are unique across guilds.
+project_registry = ProjectRegistry()  # every project, by channel, member and tracker message
+user_categories = {}  # {guild_id: {user_id: category_id}}
+project_history = {}  # {channel_id: ProjectHistory}
+user_channels = {}  # {guild_id: {user_id: {channel_id}}}, every channel a member was given, past dens included
+
+# PERSISTENT STORE
+DATA_FILE = "data.json"
+STORE_FILE = os.getenv("INKWELL_STORE", "inkwell.db")
+HISTORY_SNAPSHOT = os.getenv("INKWELL_SNAPSHOT")  # defaults to a file beside the store
+store = None
+state_loaded = False  # memory is loaded once per process; reconnects keep it
+
+def open_store(path=None):
+    """Opens the persistent store; deferred until startup so main.py imports without side effects."""
+    global store
+    store = Store(path or STORE_FILE)
+    return store
+
+def record_project(guild_id, user_id, channel_id, title, genre, current_wc, goal_wc, tracker_id, stage):
+    """Adds a freshly created project to memory and writes it through to the store."""
+    project = Project(channel_id, guild_id, user_id, title, genre, goal_wc, tracker_id, stage, datetime.utcnow())
+    project_registry.add(project)
+    user_channels.setdefault(guild_id, {}).setdefault(user_id, set()).add(channel_id)
+    store.add_project(project)
+    record_progress(channel_id, current_wc, stage)
+    schedule_inactivity(channel_id, project.last_update)
+    mark_board_dirty(guild_id, user_id)
+
+def member_projects(user_id, guild_id=None):
+    """The member's projects in one guild, or across every guild this process serves."""
+    if guild_id is not None:
+        return project_registry.member(guild_id, user_id)
+    return [project for members in project_registry.by_member.values() for project in members.get(user_id, {}).values()]
+
+def record_progress(channel_id, word_count, stage):
+    ts = int(time.time())
+    project_history.setdefault(channel_id, ProjectHistory()).append(ts, word_count, stage)
+    store.add_sample(channel_id, ts, word_count, stage)
+
+def current_word_count(channel_id):
+    """The latest recorded word count, or None if the project has no history yet."""
+    history = project_history.get(channel_id)
+    return history.latest_word_count if history else None
+
+def week_start_ts():
+    """Unix time of this week's Monday 00:00, Sydney time."""
+    sydney = pytz.timezone("Australia/Sydney")
+    today = datetime.now(sydney).date()
+    monday = today - timedelta(days=today.weekday())
+    return int(sydney.localize(datetime(monday.year, monday.month, monday.day)).timestamp())
+
+# TRACKER EDIT QUEUE
+# Tracker handles are cached per channel so updates skip fetch_message, and a
+# burst of updates in one channel is coalesced into a single edit.
+TRACKER_EDIT_DELAY = 5  # seconds to wait for more updates before editing
+
+tracker_messages = {}  # {channel_id: discord.PartialMessage}
+pending_tracker_edits = {}  # {channel_id: latest tracker content}
+tracker_edit_tasks = {}  # {channel_id: asyncio.Task}
+last_tracker_content = {}  # {channel_id: content last posted to the tracker}
+tracker_edit_stats = {"requested": 0, "sent": 0, "coalesced": 0, "unchanged": 0, "failed": 0}
+
+def get_tracker_message(channel, tracker_id):
+    tracker = tracker_messages.get(channel.id)
+    if tracker is None or tracker.id != tracker_id:
+        tracker = channel.get_partial_message(tracker_id)
+        tracker_messages[channel.id] = tracker
+    return tracker
+
+def queue_tracker_edit(channel, tracker_id, content):
+    tracker_edit_stats["requested"] += 1
+    if channel.id in pending_tracker_edits:
+        tracker_edit_stats["coalesced"] += 1
+    elif content == last_tracker_content.get(channel.id):
+        tracker_edit_stats["unchanged"] += 1
+        return
+    pending_tracker_edits[channel.id] = content
+    if channel.id not in tracker_edit_tasks:
+        tracker_edit_tasks[channel.id] = asyncio.create_task(flush_tracker_edit(channel, tracker_id))
+
+async def flush_tracker_edit(channel, tracker_id):
+    await asyncio.sleep(TRACKER_EDIT_DELAY)
+    # Take the final content and release the slot together, so an update that
+    # lands while the edit is in flight schedules its own flush
+    content = pending_tracker_edits.pop(channel.id)
+    tracker_edit_tasks.pop(channel.id, None)
+    if content == last_tracker_content.get(channel.id):
+        tracker_edit_stats["unchanged"] += 1
+        return
+    try:
+        last_tracker_content[channel.id] = content
+        await get_tracker_message(channel, tracker_id).edit(content=content)
+        tracker_edit_stats["sent"] += 1
+    except Exception as e:
+        tracker_messages.pop(channel.id, None)
+        last_tracker_content.pop(channel.id, None)
+        tracker_edit_stats["failed"] += 1
+        print(f"❌ Tracker update failed: {e}")
+
+async def known_word_count(channel, project):
+    """The project's word count, read back from its tracker if none has been recorded yet.
+
+    Projects imported from data.json have no history, so their pinned
+    tracker is the only record of the count. None if it can't be read.
+    """
+    wc = current_word_count(project.channel_id)
+    if wc is not None:
+        return wc
+    fields = parse_tracker(last_tracker_content.get(channel.id))
+    if fields is None:
+        try:
+            tracker = await get_tracker_message(channel, project.tracker_id).fetch()
+        except Exception as e:
+            print(f"❌ Couldn't read the tracker in {channel.name}: {e}")
+            return None
+        fields = parse_tracker(tracker.content)
+        if fields is not None and channel.id not in pending_tracker_edits:
+            last_tracker_content[channel.id] = tracker.content
+    return fields[3] if fields else None
+
+# PROGRESS BOARD
+# A summary in each guild's #progress-tracker, built only from memory. Each
+# member's section is re-rendered when one of their trackers changes, and stays
+# on the same page as the board grows, so the board's pages are edited in
+# place only when their text actually differs.
+PROGRESS_CHANNEL_NAME = "progress-tracker"
+BOARD_REFRESH_DELAY = 30  # seconds to batch tracker changes before republishing
+
+board_sections = {}  # {guild_id: {user_id: (rendered section, words this week)}}
+board_dirty = {}  # {guild_id: {user_id}}
+board_pages = {}  # {guild_id: [content last published, per page]}
+board_layouts = {}  # {guild_id: [[user_id] per page after the leaderboard]}
+board_weeks = {}  # {guild_id: week start the sections were rendered for}
+board_tasks = {}  # {guild_id: asyncio.Task}
+
+def mark_board_dirty(guild_id, user_id):
+    board_dirty.setdefault(guild_id, set()).add(user_id)
+    schedule_board(guild_id)
+
+def schedule_board(guild_id):
+    task = board_tasks.get(guild_id)
+    if task is None or task.done():
+        board_tasks[guild_id] = asyncio.create_task(publish_board(guild_id))
+
+def refresh_board_section(guild_id, user_id, week_start, now):
+    sections = board_sections.setdefault(guild_id, {})
+    projects = member_projects(user_id, guild_id)
+    if not projects:
+        sections.pop(user_id, None)
+        return
+    rows = []
+    words = 0
+    for project in projects:
+        history = project_history.get(project.channel_id)
+        if history:
+            words += history.words_between(week_start, now)
+        rows.append((project.title, project.stage, current_word_count(project.channel_id) or 0, project.goal_wc))
+    sections[user_id] = (render_user_section(user_id, rows), words)
+
+def render_board(guild_id):
+    now = int(time.time())
+    week_start = week_start_ts()
+    dirty = board_dirty.pop(guild_id, set())
+    if week_start != board_weeks.get(guild_id):
+        board_weeks[guild_id] = week_start
+        dirty.update(project_registry.members(guild_id))  # weekly totals reset
+    for user_id in dirty:
+        refresh_board_section(guild_id, user_id, week_start, now)
+
+    sections = board_sections.get(guild_id, {})
+    leaderboard = render_leaderboard({uid: words for uid, (_, words) in sections.items()})
+    layout = board_layouts.setdefault(guild_id, [])
+    return [leaderboard] + layout_sections(layout, {uid: section for uid, (section, _) in sections.items()})
+
+async def publish_board(guild_id):
+    while True:
+        await asyncio.sleep(BOARD_REFRESH_DELAY)
+        channel = lookup_named_channel(PROGRESS_CHANNEL_NAME, guild_id)
+        if channel is None:
+            return
+        await publish_board_pages(channel, render_board(guild_id))
+        if not board_dirty.get(guild_id):
+            return  # otherwise go round again for changes that arrived mid-publish
+
+@timed("task")
+async def publish_board_pages(channel, pages):
+    key = f"board_messages:{channel.guild.id}"
+    message_ids = store.get_meta(key)
+    if message_ids is None:
+        # Boards published before guilds were partitioned; if they belong to
+        # another guild the first edit raises NotFound and we start afresh
+        message_ids = store.get_meta("board_messages", [])
+        store.set_meta("board_messages", [])
+    published = board_pages.setdefault(channel.guild.id, [])
+    no_mentions = discord.AllowedMentions.none()
     try:
-        percent = round(current_wc / goal_wc * 100)
-        bar = "█" * (percent // 10) + "░" * (10 - percent // 10)
-    except (ValueError, ZeroDivisionError):
-        percent = 0
-        bar = "░" * 10
-        current_wc, goal_wc = 0, 1
-
-    return (
-        f"📌 **Progress Tracker for _{name}_**\n"
-        f"**Genre:** {genre}\n"
-        f"**Stage:** {stage}\n"
-        f"`{bar}` {percent}% complete\n"
-        f"**Word Count:** {current_wc} / {goal_wc}\n"
-        f"_Last updated: {datetime.utcnow().strftime('%Y-%m-%d')}_\n\n"
-        f"To update, even if one is the same, post both of the below in matching format:\n"
-        "`Current Word Count: [new count]`\n"
-        "`Stage: [new stage]`"
+        for i, page in enumerate(pages):
+            if i < len(message_ids):
+                if i < len(published) and published[i] == page:
+                    continue
+                await channel.get_partial_message(message_ids[i]).edit(content=page, allowed_mentions=no_mentions)
+            else:
+                message = await channel.send(page, allowed_mentions=no_mentions)
+                message_ids.append(message.id)
+                store.set_meta(key, message_ids)
+            published[i:i + 1] = [page]
+        for message_id in message_ids[len(pages):]:
+            try:
+                await channel.get_partial_message(message_id).delete()
+            except discord.NotFound:
+                pass
+        del message_ids[len(pages):]
+        del published[len(pages):]
+        store.set_meta(key, message_ids)
+    except discord.NotFound:
+        # Someone deleted a board message; start a fresh set next time
+        store.set_meta(key, [])
+        published.clear()
+    except Exception as e:
+        print(f"❌ Progress board update failed: {e}")
+
+# CHANNEL INDEX
+# O(1) lookups by channel ID and by (channel name, guild), kept current from
+# the gateway's channel events and warmed up from on_ready.
+GOAL_CHANNEL_NAME = "weekly-writing-goals"
+
+channel_index = {}  # {channel_id: GuildChannel}
+channels_by_name = {}  # {text channel name: {guild_id: TextChannel}}
+
+def index_channel(channel):
+    channel_index[channel.id] = channel
+    if isinstance(channel, discord.TextChannel):
+        channels_by_name.setdefault(channel.name, {})[channel.guild.id] = channel
+
+def unindex_channel(channel):
+    channel_index.pop(channel.id, None)
+    named = channels_by_name.get(channel.name)
+    if named and getattr(named.get(channel.guild.id), "id", None) == channel.id:
+        del named[channel.guild.id]
+        if not named:
+            del channels_by_name[channel.name]
+
+def index_guild(guild):
+    for channel in guild.channels:
+        index_channel(channel)
+
+def unindex_guild(guild):
+    for channel in list(channel_index.values()):
+        if channel.guild.id == guild.id:
+            unindex_channel(channel)
+
+def rebuild_channel_index():
+    channel_index.clear()
+    channels_by_name.clear()
+    for guild in bot.guilds:
+        index_guild(guild)
+
+def lookup_channel(channel_id):
+    return channel_index.get(channel_id)
+
+def lookup_named_channel(name, guild_id):
+    return channels_by_name.get(name, {}).get(guild_id)
+
+def goal_channels_for(user_id):
+    """IDs of the #weekly-writing-goals channels in this process's guilds that the user belongs to."""
+    channel_ids = []
+    for guild_id, channel in channels_by_name.get(GOAL_CHANNEL_NAME, {}).items():
+        guild = bot.get_guild(guild_id)
+        if guild is not None and guild.get_member(user_id) is not None:
+            channel_ids.append(channel.id)
+    return channel_ids
+
+@bot.event
+@timed("event")
+async def on_guild_channel_create(channel):
+    index_channel(channel)
+
+@bot.event
+@timed("event")
+async def on_guild_channel_delete(channel):
+    unindex_channel(channel)
+
+@bot.event
+@timed("event")
+async def on_guild_channel_update(before, after):
+    unindex_channel(before)
+    index_channel(after)
+
+@bot.event
+@timed("event")
+async def on_guild_join(guild):
+    index_guild(guild)
+
+@bot.event
+@timed("event")
+async def on_guild_remove(guild):
+    unindex_guild(guild)
+
+@bot.event
+@timed("event")
+async def on_guild_available(guild):
+    # Also fired, instead of on_guild_join, when a guild that was down at
+    # on_ready comes back: index it, and load any rows that were waiting on it
+    index_guild(guild)
+    if state_loaded and guild.id in adopt_legacy_rows():
+        added = load_guild(guild.id)
+        print(f"📦 Loaded {len(added)} project(s) for {guild.name} now that it's available.")
+    if board_dirty.get(guild.id):
+        schedule_board(guild.id)  # its last publish found no channel
+
+@bot.event
+@timed("event")
+async def on_guild_unavailable(guild):
+    unindex_guild(guild)
+
+# MONITORING
+monitoring_started = False
+
+def start_monitoring():
+    """Hooks REST metrics into discord.py and serves /metrics and /healthz on port 8080."""
+    global monitoring_started
+    if monitoring_started:
+        return
+    monitoring_started = True
+    metrics.instrument_http(bot.http)
+    metrics.gauge("inkwell_pending_tracker_edits", lambda: len(pending_tracker_edits))
+    metrics.gauge("inkwell_teardown_queue_depth", lambda: teardown_queue.qsize())
+    metrics.gauge("inkwell_teardown_jobs_running", lambda: len(teardown_jobs))
+    metrics.gauge("inkwell_board_dirty_users", lambda: sum(len(users) for users in board_dirty.values()))
+    metrics.gauge("inkwell_inactivity_heap_size", lambda: len(inactivity_heap))
+    metrics.gauge("inkwell_onboarding_in_progress", lambda: len(intake_sessions))
+    metrics.gauge("inkwell_intake_timers", lambda: len(intake_timers))
+    for key in tracker_edit_stats:
+        metrics.gauge(f"inkwell_tracker_edits_{key}", lambda key=key: tracker_edit_stats[key])
+    asyncio.create_task(metrics.monitor_loop_lag())
+    metrics.start_server(bot.is_ready, profiler=os.getenv("INKWELL_PROFILER") == "1")
+
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.inkwell_started = time.perf_counter()
+
+@bot.after_invoke
+async def record_command_time(ctx):
+    metrics.observe(
+        "inkwell_handler_seconds", time.perf_counter() - ctx.inkwell_started,
+        kind="command", name=ctx.command.qualified_name,
     )
+    if ctx.command_failed:
+        metrics.inc("inkwell_handler_errors_total", kind="command", name=ctx.command.qualified_name)
 
 # BOT READY
 def start_tasks():
@@ -52,237 +432,770 @@ def start_tasks():
         weekly_goal_prompt.start()
     if not inactivity_reminder.is_running():
         inactivity_reminder.start()
+    if not intake_timer.is_running():
+        intake_timer.start()
+    if not goal_digest.is_running():
+        goal_digest.start()
+    if SHARD_IDS is not None and not intake_handoff.is_running():
+        intake_handoff.start()
+    if not teardown_worker.is_running():
+        for job in store.pending_teardowns(owned_shards()):
+            teardown_queue.put_nowait(job)
+        teardown_worker.start()
+
+disconnected_at = None
 
 @bot.event
+@timed("event")
 async def on_ready():
+    started = time.monotonic()
+    start_monitoring()
+    rebuild_channel_index()
+    if state_loaded:
+        # A fresh gateway session after a reconnect: the cache was rebuilt, so
+        # re-index channels, but memory already holds every update
+        report_reconnect("reconnect", started)
+        return
+
     print(f"✅ Logged in as {bot.user}")
-    load_data()   
+    gateway_seconds = started - PROCESS_STARTED
+    load_data()
     start_tasks()
-
-# NEW MEMBER INTAKE
-# Global set to track onboarding users
-onboarding_users = set()
+    ready_seconds = time.monotonic() - PROCESS_STARTED
+    metrics.observe("inkwell_startup_seconds", ready_seconds, phase="cold")
+    print(f"⏱️ Cold start: ready in {ready_seconds:.2f}s ({gateway_seconds:.2f}s login and gateway, {ready_seconds - gateway_seconds:.2f}s state)")
+    if state_loaded:
+        asyncio.create_task(save_history_snapshot())
 
 @bot.event
-async def on_member_join(member):
-    guild = member.guild
+@timed("event")
+async def on_disconnect():
+    global disconnected_at
+    if disconnected_at is None:
+        disconnected_at = time.monotonic()
 
-    # Prevent simultaneous onboarding (but allow rejoining users later)
-    if member.id in onboarding_users:
-        print(f"⏳ Onboarding already in progress for {member.name} ({member.id}) — skipping.")
+@bot.event
+@timed("event")
+async def on_resumed():
+    report_reconnect("resume", time.monotonic())
+
+def report_reconnect(phase, started):
+    global disconnected_at
+    now = time.monotonic()
+    if disconnected_at is not None:
+        metrics.observe("inkwell_startup_seconds", now - disconnected_at, phase=phase)
+        print(f"🔁 Gateway {phase} after {now - disconnected_at:.2f}s offline; state kept, handled in {now - started:.3f}s")
+    disconnected_at = None
+
+async def ensure_members(guild):
+    """Fetches a guild's full member list the first time a feature needs it."""
+    if guild.chunked:
         return
-    onboarding_users.add(member.id)
+    started = time.monotonic()
+    await guild.chunk()
+    print(f"👥 Fetched {len(guild.members)} members of {guild.name} in {time.monotonic() - started:.2f}s")
 
-    def check(m):
-        return m.author == member and isinstance(m.channel, discord.DMChannel)
+# ONBOARDING SERVICE
+# Shared by on_member_join, !adminsetupme and !addproject: once the DM intake
+# has every answer, create channels, post and pin trackers concurrently
+# (bounded per guild), and roll the whole batch back if any part fails.
+GUILD_SETUP_CONCURRENCY = 4
 
-    try:
-        # ✅ ACTUAL INTAKE BEGINS
-        await member.send("🐾 Well, well. Another writer in need of a cozy corner...")
-        await member.send("What’s your name?")
-        name_msg = await bot.wait_for("message", check=check, timeout=300)
-        user_name = name_msg.content.strip()
-
-        word_to_num = {
-            "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
-            "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10
-        }
+guild_setup_limits = {}  # {guild_id: asyncio.Semaphore}
 
-        while True:
-            await member.send("How many projects are you juggling?\n(Enter a number or a word between 1 and 10, e.g. `3` or `three`)")
-            try:
-                response = await bot.wait_for("message", check=check, timeout=300)
-                num_text = response.content.strip().lower()
-                num_projects = int(num_text) if num_text.isdigit() else word_to_num[num_text]
-                break
-            except (KeyError, ValueError):
-                await member.send("❌ That wasn’t a valid number. Try again with something like `2` or `two`.")
-
-        # Set permissions
-        admin_role = discord.utils.get(guild.roles, name=ADMIN_ROLE_NAME)
-        overwrites = {
-            guild.default_role: discord.PermissionOverwrite(view_channel=True, send_messages=False),
-            member: discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_channels=True)
-        }
-        if admin_role:
-            overwrites[admin_role] = discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_channels=True)
+def guild_setup_limit(guild):
+    limit = guild_setup_limits.get(guild.id)
+    if limit is None:
+        limit = guild_setup_limits[guild.id] = asyncio.Semaphore(GUILD_SETUP_CONCURRENCY)
+    return limit
 
-        # Create category
-        category = await guild.create_category(name=f"{user_name}'s Projects", overwrites=overwrites)
-        user_categories[member.id] = category.id
-        user_projects[member.id] = []  # Always reinitialise in case they're rejoining
+async def delete_quietly(target):
+    try:
+        await target.delete()
+    except Exception as e:
+        print(f"❌ Rollback failed to delete {target.name}: {e}")
+
+async def create_projects(guild, category, projects):
+    """Creates a channel with a pinned tracker per project; all or nothing."""
+    async def create(details):
+        title, genre, current_wc, goal_wc, stage = details
+        async with guild_setup_limit(guild):
+            channel = await guild.create_text_channel(name=title.lower().replace(" ", "-"), category=category)
+            try:
+                content = build_tracker(title, genre, stage, current_wc, goal_wc)
+                tracker = await channel.send(content)
+                await tracker.pin()
+                last_tracker_content[channel.id] = content
+            except Exception:
+                await delete_quietly(channel)
+                raise
+        return channel, tracker
+
+    results = await asyncio.gather(*(create(details) for details in projects), return_exceptions=True)
+    failures = [r for r in results if isinstance(r, BaseException)]
+    if failures:
+        await asyncio.gather(*(delete_quietly(r[0]) for r in results if not isinstance(r, BaseException)))
+        raise failures[0]
+    return results
+
+def record_created(guild_id, user_id, created, projects):
+    for (channel, tracker), (title, genre, current_wc, goal_wc, stage) in zip(created, projects):
+        record_project(guild_id, user_id, channel.id, title, genre, current_wc, goal_wc, tracker.id, stage)
+
+async def set_up_den(member, guild, user_name, projects):
+    """Creates the member's category and project channels, then records them."""
+    started = time.monotonic()
+
+    admin_role = discord.utils.get(guild.roles, name=ADMIN_ROLE_NAME)
+    overwrites = {
+        guild.default_role: discord.PermissionOverwrite(view_channel=True, send_messages=False),
+        member: discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_channels=True)
+    }
+    if admin_role:
+        overwrites[admin_role] = discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_channels=True)
+
+    category = await guild.create_category(name=f"{user_name}'s Projects", overwrites=overwrites)
+    try:
+        created = await create_projects(guild, category, projects)
+    except Exception:
+        await delete_quietly(category)
+        raise
+
+    user_categories.setdefault(guild.id, {})[member.id] = category.id
+    for old in project_registry.remove_member(guild.id, member.id):  # in case they're rejoining
+        project_history.pop(old.channel_id, None)
+    store.reset_user(guild.id, member.id, category.id)
+    mark_board_dirty(guild.id, member.id)
+    record_created(guild.id, member.id, created, projects)
+    print(f"⏱️ Set up {len(projects)} project(s) for {member.name} in {time.monotonic() - started:.2f}s")
+
+async def add_project_to_den(member, guild, details):
+    category_id = user_categories.get(guild.id, {}).get(member.id)
+    if not category_id:
+        await member.send("Hmm. I couldn’t find your writing den. Try rejoining the server to start fresh.")
+        return
 
-        for i in range(1, num_projects + 1):
-            while True:
-                await member.send(
-                    f"📘 Project #{i}? Reply with: `Title, Genre, Current Word Count, Goal Word Count, Stage`\n"
-                    "Please separate each with a comma, and don’t use spaces in numbers."
-                )
-                msg = await bot.wait_for("message", check=check, timeout=300)
-                parts = [p.strip() for p in msg.content.split(",")]
+    category = lookup_channel(category_id)
+    if not isinstance(category, discord.CategoryChannel) or category.guild != guild:
+        await member.send("Your category has vanished like an idea at 3am. I can’t add a project without it.")
+        return
 
-                if len(parts) < 5:
-                    await member.send("❌ I need all five details. Try again.")
-                    continue
+    started = time.monotonic()
+    created = await create_projects(guild, category, [details])
+    record_created(guild.id, member.id, created, [details])
+    print(f"⏱️ Added project for {member.name} in {time.monotonic() - started:.2f}s")
+    await member.send(f"✅ Project '{details[0]}' has been added to your writing den!")
+
+# DM INTAKE
+# The onboarding and !addproject dialogs (see intake.py). on_message routes
+# each DM to its sender's session by user ID, the session is written through
+# to the store after every answer so a restart picks up where it left off,
+# and a single timer wheel expires sessions that stop answering.
+INTAKE_TICK = 1  # seconds between timer wheel ticks
+INTAKE_HANDOFF_INTERVAL = 5  # seconds between checks for dialogs finished on another process
+INTAKE_FAILURE_MESSAGES = {
+    "den": "❌ Something went wrong while setting up your den.",
+    "project": "❌ Something went wrong while setting up your project.",
+}
+
+intake_sessions = {}  # {user_id: intake.IntakeSession}
+intake_timers = intake.TimerWheel(tick=INTAKE_TICK)
+intake_jobs = set()
+
+def find_intake(user_id):
+    """The user's open dialog, if any.
+
+    With shards split across processes the store is authoritative: every DM
+    arrives on shard 0, so that process may have advanced the dialog.
+    """
+    if SHARD_IDS is None:
+        return intake_sessions.get(user_id)
+    row = store.get_intake(user_id)
+    if row is None:
+        intake_sessions.pop(user_id, None)
+        return None
+    session = intake_sessions[user_id] = intake.IntakeSession.from_row(row)
+    return session
+
+def track_intake(session):
+    intake_sessions[session.user_id] = session
+    store.put_intake(session.to_row())
+    if session.state in ("ready", "creating"):
+        intake_timers.cancel(session.user_id)
+    else:
+        intake_timers.schedule(session.user_id, session.expires_at)
+
+def drop_intake(user_id):
+    intake_sessions.pop(user_id, None)
+    intake_timers.cancel(user_id)
+    store.delete_intake(user_id)
+
+def spawn_intake_job(coro):
+    job = asyncio.create_task(coro)
+    intake_jobs.add(job)
+    job.add_done_callback(intake_jobs.discard)
+
+async def start_intake(member, guild, kind):
+    """Opens a dialog with the member; returns False if they're already in one."""
+    if find_intake(member.id) is not None:
+        return False
+    session, messages = intake.start(member.id, guild.id, kind, time.time())
+    track_intake(session)  # before sending, so an instant reply finds it
+    try:
+        for content in messages:
+            await member.send(content)
+    except Exception as e:
+        drop_intake(member.id)
+        print(f"❌ Couldn't start {kind} intake for {member.name}: {e}")
+    return True
+
+async def answer_intake(session, message):
+    messages = intake.handle(session, message.content, time.time())
+    if session.state == "closed":
+        drop_intake(session.user_id)
+    else:
+        track_intake(session)
+    try:
+        for content in messages:
+            await message.channel.send(content)
+    except Exception as e:
+        # They can't see the next question, so there's nothing left to wait for
+        drop_intake(session.user_id)
+        print(f"❌ Couldn't reply to {message.author.name} during intake: {e}")
+        return
+    if session.state == "ready":
+        build_intake(session)
+
+def build_intake(session):
+    """Starts building a finished dialog's den or project, if its guild is on this process."""
+    if bot.get_guild(session.guild_id) is None:
+        return  # its owner's intake_handoff picks it up
+    if store.claim_intake(session.user_id):
+        session.state = "creating"
+        intake_sessions[session.user_id] = session
+        spawn_intake_job(complete_intake(session))
+
+@timed("task")
+async def complete_intake(session):
+    try:
+        guild = bot.get_guild(session.guild_id)
+        member = guild.get_member(session.user_id) or await guild.fetch_member(session.user_id)
+    except Exception as e:
+        print(f"❌ {session.user_id} left before their {session.kind} could be set up: {e}")
+        drop_intake(session.user_id)
+        return
 
-                try:
-                    title, genre, current, goal, stage = parts
-                    current_wc = int(current)
-                    goal_wc = int(goal)
-                except ValueError:
-                    await member.send("❌ Word counts must be numbers. Try again.")
-                    continue
+    try:
+        if session.kind == "den":
+            await set_up_den(member, guild, session.name, session.projects)
+            await member.send("✅ All done! Your writing den is ready.")
+        else:
+            await add_project_to_den(member, guild, session.projects[0])
+    except Exception as e:
+        print(f"❌ Error during {session.kind} intake for {member.name}: {e}")
+        try:
+            await member.send(INTAKE_FAILURE_MESSAGES[session.kind])
+        except Exception:
+            pass
+    finally:
+        drop_intake(session.user_id)
 
-                channel = await guild.create_text_channel(name=title.lower().replace(" ", "-"), category=category)
-                tracker = await channel.send(build_tracker(title, genre, stage, current_wc, goal_wc))
-                await tracker.pin()
+async def notify_intake_timeout(user_id):
+    try:
+        user = bot.get_user(user_id) or await bot.fetch_user(user_id)
+        await user.send("⌛ I didn’t hear back in time, so I’ve stopped waiting for your answers.")
+    except Exception as e:
+        print(f"❌ Couldn't tell {user_id} their intake timed out: {e}")
 
-                user_projects[member.id].append((channel.id, title, datetime.utcnow(), goal_wc, tracker.id, stage))
-                user_project_metadata[channel.id] = (member.id, title, genre, goal_wc)
-                break
+def expire_intake(user_id, now):
+    if store.expire_intake(user_id, now):
+        intake_sessions.pop(user_id, None)
+        print(f"⌛ Intake for {user_id} timed out")
+        spawn_intake_job(notify_intake_timeout(user_id))
+        return
+    # Answered on another process since we scheduled it, finished, or gone
+    row = store.get_intake(user_id)
+    if row is None:
+        intake_sessions.pop(user_id, None)
+        return
+    session = intake_sessions[user_id] = intake.IntakeSession.from_row(row)
+    if session.state not in ("ready", "creating"):
+        intake_timers.schedule(user_id, session.expires_at)
+
+def restore_intake():
+    """Resumes the dialogs of this process's guilds after a restart, each at the step it was on."""
+    intake_sessions.clear()
+    intake_timers.clear()
+    for row in store.intake_sessions(owned_shards()):
+        session = intake.IntakeSession.from_row(row)
+        if session.state == "creating":
+            # The rollback may not have run, so building again could leave duplicates
+            print(f"❌ Setup for {session.user_id} was interrupted by a restart; dropping it.")
+            drop_intake(session.user_id)
+        elif session.state == "ready":
+            build_intake(session)
+        else:
+            intake_sessions[session.user_id] = session
+            intake_timers.schedule(session.user_id, session.expires_at)
+    if intake_sessions:
+        print(f"🔁 Resumed {len(intake_sessions)} intake dialog(s)")
+
+@timed("task")
+async def expire_intakes():
+    now = time.time()
+    for user_id in intake_timers.advance(now):
+        expire_intake(user_id, now)
+
+@tasks.loop(seconds=INTAKE_TICK)
+async def intake_timer():
+    await expire_intakes()
+
+@timed("task")
+async def hand_off_intakes():
+    """Builds dens for this process's guilds whose dialogs were finished on shard 0's process."""
+    for row in store.intake_sessions(owned_shards(), state="ready"):
+        build_intake(intake.IntakeSession.from_row(row))
+
+@tasks.loop(seconds=INTAKE_HANDOFF_INTERVAL)
+async def intake_handoff():
+    await hand_off_intakes()
 
-        await member.send("✅ All done! Your writing den is ready.")
+# NEW MEMBER INTAKE
+@bot.event
+@timed("event")
+async def on_member_join(member):
+    # Prevent simultaneous onboarding (but allow rejoining users later)
+    if not await start_intake(member, member.guild, "den"):
+        print(f"⏳ Onboarding already in progress for {member.name} ({member.id}) — skipping.")
 
-    except Exception as e:
-        print(f"❌ Error during onboarding for {member.name}: {e}")
+# MEMBER TEARDOWN
+# Leaving members are cleaned out of memory and the store immediately; their
+# channels are deleted by a background job with bounded parallel deletes.
+# Pending jobs live in the store, so a restart resumes them.
+TEARDOWN_CONCURRENCY = 5
 
-    finally:
-        onboarding_users.discard(member.id)
+teardown_queue = asyncio.Queue()
+teardown_limit = asyncio.Semaphore(TEARDOWN_CONCURRENCY)
+teardown_jobs = set()
 
 @bot.event
-async def on_member_remove(member):
-    guild = member.guild
-    user_id = member.id
-
-    # Remove their category and all project channels
-    if user_id in user_categories:
-        category_id = user_categories[user_id]
-        category = discord.utils.get(guild.categories, id=category_id)
+@timed("event")
+async def on_raw_member_remove(payload):
+    # on_member_remove only fires for cached members, and with chunking
+    # deferred most members aren't cached; the raw event fires for everyone
+    guild_id = payload.guild_id
+    user_id = payload.user.id
+
+    categories = user_categories.get(guild_id, {})
+    if user_id not in categories:
+        return
 
-        if category:
-            for channel in category.channels:
-                try:
-                    await channel.delete()
-                    print(f"🗑️ Deleted channel: {channel.name}")
-                except Exception as e:
-                    print(f"❌ Failed to delete channel {channel.name}: {e}")
-            try:
-                await category.delete()
-                print(f"🗑️ Deleted category: {category.name}")
-            except Exception as e:
-                print(f"❌ Failed to delete category {category.name}: {e}")
+    # Clean up from memory using the reverse index instead of a metadata sweep
+    category_id = categories.pop(user_id)
+    owned = user_channels.get(guild_id, {}).pop(user_id, set())
+    project_registry.remove_member(guild_id, user_id)
+    for cid in owned:
+        project_history.pop(cid, None)
+        tracker_messages.pop(cid, None)
+        last_tracker_content.pop(cid, None)
+
+    # Remove their category and every channel in it
+    targets = set(owned)
+    category = lookup_channel(category_id)
+    if category:
+        targets.update(channel.id for channel in category.channels)
+    job = (guild_id, user_id, category_id, sorted(targets))
+    store.begin_teardown(*job)
+    teardown_queue.put_nowait(job)
+
+    mark_board_dirty(guild_id, user_id)
+    print(f"✅ Cleaned up data for {payload.user.name}")
+
+async def delete_channel(guild, channel_id):
+    """Deletes a channel if it still exists; returns False only on a real failure."""
+    channel = guild.get_channel(channel_id)
+    if channel is None:
+        return True
+    async with teardown_limit:
+        try:
+            await channel.delete()
+            print(f"🗑️ Deleted channel: {channel.name}")
+            return True
+        except discord.NotFound:
+            return True
+        except Exception as e:
+            print(f"❌ Failed to delete channel {channel.name}: {e}")
+            return False
+
+@timed("task")
+async def run_teardown(guild_id, user_id, category_id, channel_ids):
+    guild = bot.get_guild(guild_id)
+    if guild is None:
+        print(f"❌ Teardown for {user_id} waiting: guild {guild_id} is unavailable")
+        return
 
-        # Clean up from memory
-        del user_categories[user_id]
-        del user_projects[user_id]
+    results = await asyncio.gather(*(delete_channel(guild, cid) for cid in channel_ids))
+    remaining = [cid for cid, ok in zip(channel_ids, results) if not ok]
+    if not remaining and category_id is not None and await delete_channel(guild, category_id):
+        category_id = None
 
-        # Remove from project metadata
-        for cid in list(user_project_metadata):
-            if user_project_metadata[cid][0] == user_id:
-                del user_project_metadata[cid]
+    # Anything left over stays in the store and is retried on the next start
+    store.update_teardown(guild_id, user_id, category_id, remaining)
 
-        print(f"✅ Cleaned up data for {member.name}")
+@tasks.loop()
+async def teardown_worker():
+    job = await teardown_queue.get()
+    task = asyncio.create_task(run_teardown(*job))
+    teardown_jobs.add(task)
+    task.add_done_callback(teardown_jobs.discard)
 
 # WEEKLY GOAL DM
-@tasks.loop(minutes=1)
+GOAL_PROMPT_MESSAGE = (
+    "🐾 Good afternoon, authorling. The scribbling hour is upon us once more.\n\n"
+    "**How’s your project going?**\n"
+    "Update your personal channel logbook when you can, and let me know:\n\n"
+    "**What’s your writing goal this week?**\n"
+    "Reply to this message, and I shall transcribe it into #weekly-writing-goals in my most elegant pawwriting.\n\n"
+    "—Inkwell, HRH, Meow-th of His Name"
+)
+GOAL_PROMPT_TZ = pytz.timezone("Australia/Sydney")
+GOAL_PROMPT_WEEKDAY = 6  # Sunday
+GOAL_PROMPT_HOUR = 15
+BROADCAST_CONCURRENCY = 5
+BROADCAST_MAX_ATTEMPTS = 4
+
+def next_goal_prompt_time(after):
+    """Next Sunday 15:00 Sydney time strictly after the given aware datetime."""
+    day = after.astimezone(GOAL_PROMPT_TZ).date()
+    day += timedelta(days=(GOAL_PROMPT_WEEKDAY - day.weekday()) % 7)
+    due = GOAL_PROMPT_TZ.localize(datetime(day.year, day.month, day.day, GOAL_PROMPT_HOUR))
+    if due <= after:
+        day += timedelta(days=7)
+        due = GOAL_PROMPT_TZ.localize(datetime(day.year, day.month, day.day, GOAL_PROMPT_HOUR))
+    return due
+
+async def send_goal_prompt_dm(member):
+    """DMs the goal prompt with retry and backoff; returns "sent" or "failed"."""
+    for attempt in range(BROADCAST_MAX_ATTEMPTS):
+        try:
+            await member.send(GOAL_PROMPT_MESSAGE)
+            return "sent"
+        except discord.Forbidden:
+            return "failed"  # DMs closed, retrying won't help
+        except discord.HTTPException as e:
+            if e.status != 429 and e.status < 500:
+                print(f"❌ Couldn't DM goal prompt to {member.name}: {e}")
+                return "failed"
+        except Exception as e:
+            print(f"❌ Couldn't DM goal prompt to {member.name}: {e}")
+            return "failed"
+        metrics.inc("inkwell_dm_retries_total")
+        await asyncio.sleep(2 ** attempt)
+    print(f"❌ Gave up DMing goal prompt to {member.name} after {BROADCAST_MAX_ATTEMPTS} attempts")
+    return "failed"
+
+@timed("task")
+async def run_goal_broadcast(broadcast_id):
+    started = time.monotonic()
+
+    # One DM per person, however many guilds we share with them. bot.guilds
+    # only holds this process's shards; recipients another process has already
+    # claimed in the store are left to it
+    recipients = {}
+    for guild in bot.guilds:
+        await ensure_members(guild)
+        for member in guild.members:
+            if not member.bot:
+                recipients.setdefault(member.id, member)
+
+    # Progress is persisted per recipient so a restart resumes instead of resending
+    store.start_broadcast(broadcast_id, SHARD_OWNER, recipients)
+    counts = {"sent": 0, "failed": 0, "skipped": 0}
+    pending = []
+    for user_id, status in store.broadcast_statuses(broadcast_id, SHARD_OWNER).items():
+        if status != "pending":
+            counts["skipped"] += 1
+        elif user_id not in recipients:
+            store.mark_recipient(broadcast_id, user_id, "skipped")
+            counts["skipped"] += 1
+        else:
+            pending.append(recipients[user_id])
+
+    semaphore = asyncio.Semaphore(BROADCAST_CONCURRENCY)
+
+    async def deliver(member):
+        async with semaphore:
+            status = await send_goal_prompt_dm(member)
+        if status == "sent":
+            store.add_goal_relays(member.id, goal_channels_for(member.id))
+        store.mark_recipient(broadcast_id, member.id, status)
+        counts[status] += 1
+
+    await asyncio.gather(*(deliver(member) for member in pending))
+    store.finish_broadcast(broadcast_id, SHARD_OWNER)
+    print(
+        f"📬 Goal broadcast {broadcast_id}: {counts['sent']} sent, {counts['failed']} failed, "
+        f"{counts['skipped']} skipped in {time.monotonic() - started:.1f}s"
+    )
+    return counts
+
+@tasks.loop()
 async def weekly_goal_prompt():
-    now = datetime.now(pytz.timezone("Australia/Sydney"))
-    if now.weekday() == 6 and now.hour == 15 and now.minute == 0:
-        for guild in bot.guilds:
-            for member in guild.members:
-                if member.bot:
-                    continue
-                try:
-                    await member.send(
-                        "🐾 Good afternoon, authorling. The scribbling hour is upon us once more.\n\n"
-                        "**How’s your project going?**\n"
-                        "Update your personal channel logbook when you can, and let me know:\n\n"
-                        "**What’s your writing goal this week?**\n"
-                        "Reply to this message, and I shall transcribe it into #weekly-writing-goals in my most elegant pawwriting.\n\n"
-                        "—Inkwell, HRH, Meow-th of His Name"
-                    )
-                    user_goals[member.id] = True
-                except:
-                    continue
+    try:
+        broadcast_id = store.unfinished_broadcast(SHARD_OWNER)
+        if broadcast_id:
+            print(f"🔁 Resuming interrupted goal broadcast {broadcast_id}")
+        else:
+            due = next_goal_prompt_time(datetime.now(pytz.utc))
+            await discord.utils.sleep_until(due)
+            broadcast_id = due.strftime("weekly-goal-%Y-%m-%d")
+        await run_goal_broadcast(broadcast_id)
+    except Exception as e:
+        print(f"❌ Weekly goal broadcast failed: {e}")
+        await asyncio.sleep(60)
+
+# GOAL DIGEST
+# Replies to the goal prompt arrive in a burst on Sunday afternoon. They are
+# logged and queued in the store as they arrive, and relayed here every few
+# seconds as combined messages, one digest per channel. DMs only reach shard
+# 0, so the goal channels, which may be on other shards, are posted to by ID.
+GOAL_DIGEST_INTERVAL = 10  # seconds between digests
+
+@timed("task")
+async def send_goal_digests():
+    for channel_id, pending in store.pending_goal_posts(SHARD_OWNER).items():
+        channel = lookup_channel(channel_id) or bot.get_partial_messageable(channel_id)
+        for content, goal_ids in goals.digest_pages(pending):
+            try:
+                await channel.send(content, allowed_mentions=discord.AllowedMentions.none())
+            except (discord.NotFound, discord.Forbidden) as e:
+                print(f"❌ Dropping {len(goal_ids)} weekly goal(s) for channel {channel_id}: {e}")
+            except Exception as e:
+                print(f"❌ Couldn't relay weekly goals to channel {channel_id}, will retry: {e}")
+                break
+            store.finish_goal_posts(channel_id, goal_ids)
+
+@tasks.loop(seconds=GOAL_DIGEST_INTERVAL)
+async def goal_digest():
+    await send_goal_digests()
 
 
 # INACTIVITY REMINDER
-@tasks.loop(hours=24)
-async def inactivity_reminder():
+# A min-heap of (due, channel_id, last_update) entries. Updates push a fresh
+# entry and leave the old one behind; stale entries are recognised and dropped
+# when they surface, so the reminder only ever touches projects that are due.
+INACTIVITY_THRESHOLD = timedelta(days=14)
+INACTIVITY_REPEAT = timedelta(days=1)
+
+inactivity_heap = []
+inactivity_wakeup = asyncio.Event()
+
+def rebuild_inactivity_index():
+    inactivity_heap[:] = [
+        (project.last_update + INACTIVITY_THRESHOLD, project.channel_id, project.last_update)
+        for project in project_registry
+    ]
+    heapq.heapify(inactivity_heap)
+    inactivity_wakeup.set()
+
+def compact_inactivity_heap():
+    """Drops superseded entries, keeping the due time of the rest, reminder re-queues included."""
+    inactivity_heap[:] = [
+        (due, channel_id, last) for due, channel_id, last in inactivity_heap
+        if getattr(project_registry.get(channel_id), "last_update", None) == last
+    ]
+    heapq.heapify(inactivity_heap)
+    inactivity_wakeup.set()
+
+def schedule_inactivity(channel_id, last_update, due=None):
+    entry = (due or last_update + INACTIVITY_THRESHOLD, channel_id, last_update)
+    heapq.heappush(inactivity_heap, entry)
+    if len(inactivity_heap) > 2 * len(project_registry) + 64:
+        compact_inactivity_heap()
+    elif inactivity_heap[0] is entry:
+        inactivity_wakeup.set()
+
+@timed("task")
+async def send_inactivity_reminders():
+    """Pops every due entry and sends one reminder per user; returns how many were sent."""
     now = datetime.utcnow()
-    for uid, projects in user_projects.items():
-        inactive = [title for _, title, last, _, _, _ in projects if now - last > timedelta(days=14)]
-        if inactive:
-            try:
-                user = await bot.fetch_user(uid)
-                await user.send(
+    inactive = {}
+    while inactivity_heap and inactivity_heap[0][0] <= now:
+        _, chan_id, last = heapq.heappop(inactivity_heap)
+        project = project_registry.get(chan_id)
+        if project is None or project.last_update != last:
+            continue  # project removed or updated since this entry was pushed
+        inactive.setdefault(project.user_id, []).append(project.title)
+        schedule_inactivity(chan_id, last, now + INACTIVITY_REPEAT)
+
+    sent = 0
+    for uid, titles in inactive.items():
+        try:
+            user = bot.get_user(uid) or await bot.fetch_user(uid)
+            await user.send(
+                "🙀 Just a gentle reminder: I noticed you haven’t updated the progress tracker for the following projects in a while:\n"
+                + "\n".join(f"• {title}" for title in titles)
+                + "\n\nPop in and give us an update when you can. We’d love to hear how you’re going!"
+            )
+            sent += 1
+        except Exception as e:
+            print(f"❌ Couldn't send inactivity reminder to {uid}: {e}")
+    return sent
 
-DATA_FILE = "data.json"
+@tasks.loop()
+async def inactivity_reminder():
+    await send_inactivity_reminders()
+
+    # Sleep until the next entry is due, or until an earlier one is pushed
+    inactivity_wakeup.clear()
+    if inactivity_heap:
+        delay = (inactivity_heap[0][0] - datetime.utcnow()).total_seconds()
+    else:
+        delay = INACTIVITY_REPEAT.total_seconds()
+    try:
+        await asyncio.wait_for(inactivity_wakeup.wait(), timeout=max(delay, 0))
+    except asyncio.TimeoutError:
+        pass
+
+
+def adopt_legacy_rows():
+    """Assigns rows saved before state was partitioned by guild to the guild their channel is in."""
+    channel_ids, categories = store.unassigned()
+    channel_guilds = {}
+    for channel_id in channel_ids:
+        channel = lookup_channel(channel_id)
+        if channel is not None:
+            channel_guilds[channel_id] = channel.guild.id
+    category_guilds = {}
+    for user_id, category_id in categories:
+        category = lookup_channel(category_id)
+        if category is not None:
+            category_guilds[(user_id, category_id)] = category.guild.id
+    if channel_guilds or category_guilds:
+        store.assign_guilds(channel_guilds, category_guilds)
+        print(f"📦 Matched {len(channel_guilds)} project channel(s) and {len(category_guilds)} den(s) to their guilds.")
+    return set(channel_guilds.values()) | set(category_guilds.values())
+
+def load_guild(guild_id):
+    """Merges one guild's stored rows into memory, keeping whatever is already there.
+
+    For rows adopted after startup because their guild was unavailable at
+    on_ready. Returns the projects added.
+    """
+    registry, categories = store.load(guild_id=guild_id)
+    added = [project for project in registry if project_registry.get(project.channel_id) is None]
+    history = store.load_history(guild_id=guild_id)
+    for project in added:
+        project_registry.add(project)
+        if project.channel_id in history:
+            project_history[project.channel_id] = history[project.channel_id]
+        schedule_inactivity(project.channel_id, project.last_update)
+        mark_board_dirty(guild_id, project.user_id)
+    for user_id, category_id in categories.get(guild_id, {}).items():
+        user_categories.setdefault(guild_id, {}).setdefault(user_id, category_id)
+    for user_id, channel_ids in store.member_channels(guild_id=guild_id).get(guild_id, {}).items():
+        user_channels.setdefault(guild_id, {}).setdefault(user_id, set()).update(channel_ids)
+    return added
+
+def history_snapshot_path():
+    owner = "all" if SHARD_OWNER == "*" else SHARD_OWNER.replace(",", "_")
+    return HISTORY_SNAPSHOT or f"{os.path.splitext(store.path)[0]}-{owner}.history"
+
+def load_history(shards):
+    """Reads history from the binary snapshot topped up with newer rows, or in full from the store."""
+    _, epoch = store.history_marker()
+    cached = snapshot.read(history_snapshot_path(), epoch, str(shards))
+    if cached is None:
+        return store.load_history(shards), "store"
+    last_rowid, history = cached
+    return store.load_history(shards, after_rowid=last_rowid, history=history), "snapshot"
+
+def capture_history():
+    """Copies history on the event loop, consistent with the store, for snapshot.write to encode off it."""
+    last_rowid, epoch = store.history_marker()
+    columns = {
+        channel_id: (history.times[:], history.counts[:], history.stages[:])
+        for channel_id, history in project_history.items()
+    }
+    return history_snapshot_path(), columns, last_rowid, epoch, str(owned_shards())
+
+async def save_history_snapshot():
+    try:
+        size = await asyncio.to_thread(snapshot.write, *capture_history())
+        print(f"💾 Wrote history snapshot ({size:,} bytes)")
+    except Exception as e:
+        print(f"❌ Failed to write history snapshot: {e}")
 
 def load_data():
-    if not os.path.exists(DATA_FILE):
-        print("📂 No data.json found. Skipping load.")
-        return
+    """Loads memory for this process's shards once, importing data.json the first time the store is empty."""
+    global project_registry, user_categories, project_history, user_channels
+    global state_loaded
     try:
-        with open(DATA_FILE, "r") as f:
-            data = json.load(f)
-            global user_projects, user_categories, user_project_metadata
-            user_projects = {
-                int(k): [
-                    (item[0], item[1], datetime.fromisoformat(item[2]), item[3], item[4], item[5])
-                    for item in v
-                ] for k, v in data["user_projects"].items()
-            }
-            user_categories = {int(k): v for k, v in data["user_categories"].items()}
-            user_project_metadata = {int(k): tuple(v) for k, v in data["user_project_metadata"].items()}
-        print("✅ Successfully loaded project data from file.")
+        started = time.monotonic()
+        if store is None:
+            open_store()
+        if store.is_empty() and os.path.exists(DATA_FILE):
+            with open(DATA_FILE, "r") as f:
+                store.import_snapshot(json.load(f))
+            print("📦 Imported data.json into the persistent store.")
+        adopt_legacy_rows()
+        shards = owned_shards()
+        project_registry, user_categories = store.load(shards)
+        project_history, source = load_history(shards)
+        user_channels = store.member_channels(shards)
+        rebuild_inactivity_index()
+        restore_intake()
+        board_sections.clear()
+        board_layouts.clear()
+        for guild_id, members in project_registry.by_member.items():
+            for user_id in members:
+                mark_board_dirty(guild_id, user_id)
+        state_loaded = True
+        elapsed = time.monotonic() - started
+        metrics.observe("inkwell_startup_seconds", elapsed, phase="load")
+        print(
+            f"✅ Loaded {len(project_registry)} project(s) and {sum(map(len, project_history.values()))} "
+            f"history sample(s) in {elapsed:.2f}s (history from the {source})."
+        )
     except Exception as e:
         print(f"❌ Failed to load data: {e}")
 
 
+def write_snapshot(data):
+    with open(DATA_FILE, "w") as f:
+        json.dump(data, f, indent=4)
+
 
 @bot.command(name="saveprojects")
 @commands.has_role("Admin")
 async def save_projects(ctx):
-    """Saves all project and category data based on real channel-to-user mapping."""
-
-    global user_categories
-    user_categories = {}
+    """Exports this process's project and category data to data.json, as memory and the store hold it."""
 
     try:
-        # Infer each user's category by tracing their project channels
-        for user_id, projects in user_projects.items():
-            for chan_id, _, _, _, _, _ in projects:
-                for guild in bot.guilds:
-                    channel = discord.utils.get(guild.channels, id=chan_id)
-                    if channel and channel.category:
-                        user_categories[user_id] = channel.category.id
-                        break  # Once we find one, stop checking for that user
-                if user_id in user_categories:
-                    break
-
-        # Convert datetime objects to strings
+        # The registry's records, in the data.json layout import_snapshot reads
         serializable_user_projects = {}
-        for user_id, projects in user_projects.items():
-            serializable_user_projects[user_id] = []
-            for channel_id, title, last_update, goal_wc, tracker_id, stage in projects:
-                serializable_user_projects[user_id].append((
-                    channel_id,
-                    title,
-                    last_update.isoformat(),
-                    goal_wc,
-                    tracker_id,
-                    stage
-                ))
+        for guild_id, members in project_registry.by_member.items():
+            serializable_user_projects[guild_id] = {}
+            for user_id, projects in members.items():
+                serializable_user_projects[guild_id][user_id] = [
+                    (p.channel_id, p.title, p.last_update.isoformat(), p.goal_wc, p.tracker_id, p.stage)
+                    for p in projects.values()
+                ]
 
         data = {
+            "version": 2,  # partitioned by guild
             "user_projects": serializable_user_projects,
-            "user_categories": user_categories,
-            "user_project_metadata": user_project_metadata,
+            "user_categories": {guild_id: dict(categories) for guild_id, categories in user_categories.items()},
+            "user_project_metadata": {
+                p.channel_id: (p.user_id, p.title, p.genre, p.goal_wc) for p in project_registry
+            },
         }
 
-        with open(DATA_FILE, "w") as f:
-            json.dump(data, f, indent=4)
+        # Snapshot export only; every change is already persisted by the store. The
+        # categories are copied above because json.dump runs on a worker thread
+        await asyncio.to_thread(write_snapshot, data)
+        store.checkpoint()
+        await save_history_snapshot()
 
         await ctx.send("✅ Successfully saved project data to file.")
 
@@ -298,55 +1211,306 @@ async def save_projects(ctx):
         print(f"❌ Save error: {e}")
 
 
-        
-# MANUAL PROJECT ADD
-@bot.command(name="addproject")
-async def add_project(ctx):
-    member = ctx.author
-    if member.bot:
-        return
+# DATA EXPORT
+# !export streams history rows out of the store on a worker thread, which
+# writes them into upload-sized files; each file is DMed as soon as it is
+# finished, and a status message shows progress, all without blocking the
+# event loop.
+EXPORT_CHUNK_BYTES = 8 * 1024 * 1024  # under Discord's 10 MiB upload limit
+EXPORT_PROGRESS_INTERVAL = 5  # seconds between progress edits
+
+export_lock = asyncio.Lock()
 
-    def check(m):
-        return m.author == member and isinstance(m.channel, discord.DMChannel)
+async def is_admin_in(guild, user_id):
+    if guild is None:
+        return False
+    member = guild.get_member(user_id)
+    if member is None:  # members aren't all cached until the guild is chunked
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            return False
+    return discord.utils.get(member.roles, name=ADMIN_ROLE_NAME) is not None
 
+@bot.command(name="export")
+@commands.has_role(ADMIN_ROLE_NAME)
+async def export_data(ctx, *options):
+    """Exports project history as CSV, JSON Lines or gzipped JSON, DMed in upload-sized parts."""
     try:
-        await member.send("📦 Time to hatch a new project? I’m listening.\nReply with: `Title, Genre, Current Word Count, Goal Word Count, Stage`")
-        details = await bot.wait_for("message", check=check, timeout=300)
-        parts = [p.strip() for p in details.content.split(",")]
+        fmt, filters = export.parse_options(options)
+    except ValueError as e:
+        await ctx.send(str(e))
+        return
+    guild_id = filters["guild_id"] or ctx.guild.id
+    if guild_id != ctx.guild.id and not await is_admin_in(bot.get_guild(guild_id), ctx.author.id):
+        await ctx.send("❌ You can only export servers where you’re an admin.")
+        return
+    if export_lock.locked():
+        await ctx.send("⏳ Another export is running. Try again when it’s finished.")
+        return
 
-        if len(parts) < 5:
-            await member.send("❌ I need all five details. Try again with the format: `Title, Genre, Current WC, Goal WC, Stage`.")
+    async with export_lock:
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+        progress = {"records": 0}
+        cancelled = threading.Event()
+        workdir = tempfile.mkdtemp(prefix="inkwell-export-")
+        basename = f"inkwell-{guild_id}-{datetime.utcnow():%Y%m%d-%H%M%S}"
+
+        def work():
+            rows = store.export_rows(guild_id, filters["user_id"], filters["since"], filters["until"])
+            try:
+                return export.write_export(
+                    rows, fmt, workdir, basename, EXPORT_CHUNK_BYTES,
+                    lambda path: loop.call_soon_threadsafe(chunks.put_nowait, path), progress, cancelled,
+                )
+            finally:
+                rows.close()  # its connection belongs to this thread
+                loop.call_soon_threadsafe(chunks.put_nowait, None)
+
+        job = asyncio.create_task(asyncio.to_thread(work))
+        status = await ctx.send("📦 Export started…")
+        parts = 0
+        reported = time.monotonic()
+        try:
+            while True:
+                try:
+                    path = await asyncio.wait_for(chunks.get(), EXPORT_PROGRESS_INTERVAL)
+                except asyncio.TimeoutError:
+                    path = ""
+                if path is None:
+                    break
+                if path:
+                    with open(path, "rb") as f:
+                        await ctx.author.send(f"📂 Export part {parts + 1}", file=discord.File(f, os.path.basename(path)))
+                    os.remove(path)
+                    parts += 1
+                if time.monotonic() - reported >= EXPORT_PROGRESS_INTERVAL:
+                    reported = time.monotonic()
+                    await status.edit(content=f"📦 Exporting… {progress['records']:,} records so far, {parts} part(s) sent.")
+            records = await job
+        except Exception as e:
+            cancelled.set()
+            await asyncio.gather(job, return_exceptions=True)
+            await status.edit(content=f"❌ Export failed after {parts} part(s): {e}")
+            print(f"❌ Export error: {e}")
             return
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
 
-        try:
-            title, genre, current, goal, stage = parts
-            current_wc = int(current)
-            goal_wc = int(goal)
-        except ValueError:
-            await member.send("❌ Word counts must be numbers. Try again.")
+        if not records:
+            await status.edit(content="🗂 No history matches that export.")
             return
+        elapsed = time.monotonic() - started
+        await status.edit(content=f"✅ Exported {records:,} records in {parts} part(s) in {elapsed:.1f}s. Check your DMs.")
+        print(f"📦 Exported {records:,} records for guild {guild_id} as {fmt} in {elapsed:.1f}s")
+
+
+# STATE REBUILD
+# Every project channel holds the tracker build_tracker pinned there, so a
+# guild's state can be recovered from Discord alone: each "<name>'s Projects"
+# category is a den, owned by the member its overwrites let manage it, and
+# each pinned tracker gives a project's title, genre, stage and counts.
+# !rebuildstate reads the pins concurrently and reports how the result
+# differs from memory; `!rebuildstate apply` then swaps it in.
+DEN_SUFFIX = "'s Projects"
+REBUILD_CONCURRENCY = 8  # pinned-message reads in flight at once
+REBUILD_REPORT_LINES = 40  # detail lines shown per report
+
+rebuild_lock = asyncio.Lock()
+
+def den_owner(category, known_owners):
+    """The member the den's overwrites let manage it, else whoever memory says owns it."""
+    for target, overwrite in category.overwrites.items():
+        is_role = isinstance(target, discord.Role) or getattr(target, "type", None) is discord.Role
+        if overwrite.manage_channels and not is_role:
+            return target.id
+    return known_owners.get(category.id)
+
+async def pinned_messages(channel):
+    # discord.py 2.6 made pins() an async iterator; uv.lock still resolves 2.5
+    pins = channel.pins()
+    if hasattr(pins, "__aiter__"):
+        return [message async for message in pins]
+    return await pins
+
+async def read_tracker(channel, limit):
+    """(message, parsed tracker) for the bot's pinned tracker in the channel, or None."""
+    async with limit:
+        for message in await pinned_messages(channel):
+            fields = parse_tracker(message.content) if message.author.id == bot.user.id else None
+            if fields:
+                return message, fields
+    return None
+
+async def scan_trackers(guild):
+    """Rebuilds the guild's projects and dens from its pinned trackers.
+
+    Projects in channels whose pins couldn't be read, or in dens whose owner
+    couldn't be told, are carried over as memory has them rather than
+    dropped. Returns (projects, {user_id: category_id},
+    {channel_id: (tracker content, word count)} for the projects read from a
+    tracker, problems, channels read).
+    """
+    known_owners = {cid: uid for uid, cid in user_categories.get(guild.id, {}).items()}
+    owners = {}
+    categories = {}
+    skipped = set()
+    problems = []
+    for category in guild.categories:
+        if not category.name.endswith(DEN_SUFFIX):
+            continue
+        owner = den_owner(category, known_owners)
+        if owner is None:
+            problems.append(f"⚠️ Couldn’t tell who owns **{category.name}**; kept its projects as they were.")
+            skipped.add(category.id)
+            continue
+        owners[category.id] = owner
+        categories[owner] = category.id
+
+    channels = [channel for channel in guild.text_channels if channel.category_id in owners]
+    limit = asyncio.Semaphore(REBUILD_CONCURRENCY)
+    results = await asyncio.gather(*(read_tracker(channel, limit) for channel in channels), return_exceptions=True)
+
+    rebuilt = []
+    for channel in guild.text_channels:
+        existing = project_registry.get(channel.id) if channel.category_id in skipped else None
+        if existing is not None:
+            rebuilt.append(existing)
+    trackers = {}
+    for channel, result in zip(channels, results):
+        if isinstance(result, BaseException):
+            problems.append(f"⚠️ Couldn’t read the pins in <#{channel.id}>, so it was kept as it was: {result}")
+            existing = project_registry.get(channel.id)
+            if existing is not None:
+                rebuilt.append(existing)
+            continue
+        if result is None:
+            continue  # not a project channel, or its tracker was unpinned
+        message, (title, genre, stage, current_wc, goal_wc, updated) = result
+        last_update = datetime.fromisoformat(updated)
+        existing = project_registry.get(channel.id)
+        if existing is not None and existing.last_update > last_update:
+            last_update = existing.last_update  # same day, or an edit still queued
+        rebuilt.append(Project(
+            channel.id, guild.id, owners[channel.category_id], title, genre, goal_wc, message.id, stage, last_update
+        ))
+        trackers[channel.id] = (message.content, current_wc)
+    return rebuilt, categories, trackers, problems, len(channels)
+
+def rebuild_report(guild_id, rebuilt, categories, trackers):
+    """Lines describing how the rebuilt state differs from memory."""
+    added, removed, changed = diff_projects(project_registry.guild(guild_id), rebuilt)
+    counts = [
+        (project, current_word_count(project.channel_id), trackers[project.channel_id][1])
+        for project in rebuilt
+        if project.channel_id in trackers and project_registry.get(project.channel_id) is not None
+        and current_word_count(project.channel_id) not in (None, trackers[project.channel_id][1])
+    ]
+    current_dens = user_categories.get(guild_id, {})
+    dens = sorted(uid for uid in current_dens.keys() | categories.keys() if current_dens.get(uid) != categories.get(uid))
+
+    lines = [
+        f"➕ {len(added)} project(s) to add, ➖ {len(removed)} to remove, ✏️ {len(changed)} changed, "
+        f"🔢 {len(counts)} word count(s) out of date, 🗂 {len(dens)} den(s) changed."
+    ]
+    details = [f"➕ <#{p.channel_id}> **{p.title}** for <@{p.user_id}>" for p in added]
+    details += [f"➖ <#{p.channel_id}> **{p.title}** of <@{p.user_id}> has no tracker" for p in removed]
+    for old, new, fields in changed:
+        details.append(f"✏️ <#{new.channel_id}> " + ", ".join(
+            f"{field}: {getattr(old, field)} → {getattr(new, field)}" for field in fields
+        ))
+    details += [f"🔢 <#{p.channel_id}> word count: {old:,} → {new:,}" for p, old, new in counts]
+    details += [f"🗂 <@{uid}>: den {current_dens.get(uid)} → {categories.get(uid)}" for uid in dens]
+    if len(details) > REBUILD_REPORT_LINES:
+        details[REBUILD_REPORT_LINES:] = [f"…and {len(details) - REBUILD_REPORT_LINES} more."]
+    return lines + details, bool(added or removed or changed or counts or dens)
+
+def apply_rebuild(guild_id, rebuilt, categories, trackers):
+    """Swaps the guild's projects and dens for the rebuilt ones, in memory and in the store."""
+    removed = project_registry.remove_guild(guild_id)
+    previous = {project.channel_id: project.last_update for project in removed}
+    rebuilt_ids = {project.channel_id for project in rebuilt}
+    for old in removed:
+        if old.channel_id not in rebuilt_ids:
+            project_history.pop(old.channel_id, None)
+    for project in rebuilt:
+        project_registry.add(project)
+        user_channels.setdefault(guild_id, {}).setdefault(project.user_id, set()).add(project.channel_id)
+    user_categories[guild_id] = dict(categories)
+    store.replace_guild_projects(guild_id, rebuilt, categories)
+
+    for project in rebuilt:
+        if project.channel_id not in trackers:
+            continue  # carried over unread
+        content, word_count = trackers[project.channel_id]
+        tracker = tracker_messages.get(project.channel_id)
+        if tracker is not None and tracker.id != project.tracker_id:
+            tracker_messages.pop(project.channel_id)
+        if project.channel_id not in pending_tracker_edits:
+            last_tracker_content[project.channel_id] = content
+        if current_word_count(project.channel_id) != word_count:
+            record_progress(project.channel_id, word_count, project.stage)
+    # Keep pending reminders' due times; only projects with a new last update are rescheduled
+    compact_inactivity_heap()
+    for project in rebuilt:
+        if previous.get(project.channel_id) != project.last_update:
+            schedule_inactivity(project.channel_id, project.last_update)
+    for user_id in {p.user_id for p in removed} | {p.user_id for p in rebuilt}:
+        mark_board_dirty(guild_id, user_id)
+
+@bot.command(name="rebuildstate")
+@commands.has_role(ADMIN_ROLE_NAME)
+async def rebuild_state(ctx, action=None):
+    """Rebuilds this server's projects and dens from pinned trackers: shows the changes, and `apply` makes them."""
+    if action not in (None, "apply"):
+        await ctx.send("Run `!rebuildstate` to preview what the trackers say, then `!rebuildstate apply` to use it.")
+        return
+    if rebuild_lock.locked():
+        await ctx.send("⏳ A rebuild is already running.")
+        return
 
+    async with rebuild_lock:
         guild = ctx.guild
-        category_id = user_categories.get(member.id)
-        if not category_id:
-            await member.send("Hmm. I couldn’t find your writing den. Try rejoining the server to start fresh.")
-            return
+        status = await ctx.send("🔎 Reading pinned trackers…")
+        started = time.monotonic()
+        rebuilt, categories, trackers, problems, scanned = await scan_trackers(guild)
+        elapsed = time.monotonic() - started
+        rate = scanned / elapsed if elapsed else 0
+        summary = (
+            f"🔎 Read {scanned} channel(s) in {len(categories)} den(s) in {elapsed:.1f}s "
+            f"({rate:.1f} channels/s, {REBUILD_CONCURRENCY} at a time) and found {len(trackers)} tracker(s)."
+        )
+        print(f"{summary} ({guild.name})")
 
-        category = discord.utils.get(guild.categories, id=category_id)
-        if not category:
-            await member.send("Your category has vanished like an idea at 3am. I can’t add a project without it.")
-            return
+        lines, differs = rebuild_report(guild.id, rebuilt, categories, trackers)
+        if not differs:
+            lines = ["✅ Memory already matches the trackers."]
+        elif action == "apply":
+            apply_rebuild(guild.id, rebuilt, categories, trackers)
+            lines.append(f"✅ Rebuilt {len(rebuilt)} project(s) in {len(categories)} den(s) from their trackers.")
+            print(f"✅ Rebuilt state for {guild.name}: {len(rebuilt)} project(s)")
+        else:
+            lines.append("Run `!rebuildstate apply` to replace this server’s state with what the trackers say.")
 
-        channel = await guild.create_text_channel(name=title.lower().replace(" ", "-"), category=category)
-        tracker = await channel.send(build_tracker(title, genre, stage, current_wc, goal_wc))
-        await tracker.pin()
-        user_projects[member.id].append((channel.id, title, datetime.utcnow(), goal_wc, tracker.id, stage))
-        user_project_metadata[channel.id] = (member.id, title, genre, goal_wc)
-        await member.send(f"✅ Project '{title}' has been added to your writing den!")
+        await status.edit(content=summary)
+        for page in paginate(lines + problems[:REBUILD_REPORT_LINES], separator="\n"):
+            await ctx.send(page, allowed_mentions=discord.AllowedMentions.none())
 
-    except Exception as e:
-        await member.send("❌ Something went wrong while setting up your project.")
-        print(f"❌ Error in addproject command: {e}")
+
+# MANUAL PROJECT ADD
+@bot.command(name="addproject")
+async def add_project(ctx):
+    member = ctx.author
+    if member.bot:
+        return
+
+    if ctx.guild is None:
+        await member.send("Run `!addproject` in the server where your writing den lives.")
+        return
+    if not await start_intake(member, ctx.guild, "project"):
+        await member.send("⏳ Let’s finish the questions I’ve already asked you first.")
 
 @bot.command(name="sendgoalprompt")
 async def send_goal_prompt(ctx):
@@ -356,21 +1520,60 @@ async def send_goal_prompt(ctx):
         return
 
     try:
-        await member.send(
-            "🐾 Good afternoon, authorling. The scribbling hour is upon us once more.\n\n"
-            "**How’s your project going?**\n"
-            "Update your personal channel logbook when you can, and let me know:\n\n"
-            "**What’s your writing goal this week?**\n"
-            "Reply to this message, and I shall transcribe it into #weekly-writing-goals in my most elegant pawwriting.\n\n"
-            "—Inkwell, HRH, Meow-th of His Name"
-        )
-        user_goals[member.id] = True
+        await member.send(GOAL_PROMPT_MESSAGE)
+        channel_ids = set(goal_channels_for(member.id))
+        goal_channel = lookup_named_channel(GOAL_CHANNEL_NAME, ctx.guild.id) if ctx.guild else None
+        if goal_channel:
+            channel_ids.add(goal_channel.id)  # the author may not be in the member cache
+        store.add_goal_relays(member.id, channel_ids)
         await ctx.send("✅ I've sent you the goal prompt!")
     except Exception as e:
         await ctx.send("❌ Failed to send you the goal prompt.")
         print(f"❌ Error sending manual goal prompt: {e}")
 
 
+@bot.command(name="goals")
+async def list_goals(ctx, member: discord.Member = None):
+    """Lists your recent weekly goals, or another member's."""
+    member = member or ctx.author
+    rows = store.goals_for_user(member.id)
+    if not rows:
+        await ctx.send(f"🗒 No weekly goals logged for {member.display_name} yet.")
+        return
+    blocks = [f"🗒 **{member.display_name}'s recent weekly goals**"] + [
+        f"**Week of {week}**\n" + "\n".join(f"> {line}" for line in content.splitlines())
+        for week, _, content in rows
+    ]
+    for page in paginate(blocks):
+        await ctx.send(page, allowed_mentions=discord.AllowedMentions.none())
+
+
+@bot.command(name="weekgoals")
+@commands.guild_only()
+async def week_goals(ctx, week=None):
+    """Lists this server's goals for a week: `!weekgoals` for this one, or `!weekgoals 2024-06-03`."""
+    try:
+        if week is None:
+            week = goals.goal_week(time.time())
+        else:
+            day = datetime.fromisoformat(week).date()
+            week = (day - timedelta(days=day.weekday())).isoformat()
+    except ValueError:
+        await ctx.send("❌ Give the week as a date, like `2024-06-03`.")
+        return
+
+    await ensure_members(ctx.guild)
+    rows = [row for row in store.goals_for_week(week) if ctx.guild.get_member(row[0]) is not None]
+    if not rows:
+        await ctx.send(f"🗒 No weekly goals logged for the week of {week}.")
+        return
+    blocks = [f"🗒 **Weekly goals for the week of {week}**"] + [
+        goals.render_goal(author, ts, content) for _, author, ts, content in rows
+    ]
+    for page in paginate(blocks):
+        await ctx.send(page, allowed_mentions=discord.AllowedMentions.none())
+
+
 @bot.command(name="adminsetupme")
 @commands.has_role(ADMIN_ROLE_NAME)
 async def admin_setup_me(ctx):
@@ -378,127 +1581,112 @@ async def admin_setup_me(ctx):
     guild = ctx.guild
 
     # Skip if user already has a project setup
-    if member.id in user_projects:
+    if member.id in user_categories.get(guild.id, {}) or project_registry.member(guild.id, member.id):
         await member.send("🗂 You already have a writing den set up.")
         return
 
-    def check(m):
-        return m.author == member and isinstance(m.channel, discord.DMChannel)
-
-    try:
-        await member.send("🐾 Well, well. Another writer in need of a cozy corner...")
-        await member.send("What’s your name?")
-        name_msg = await bot.wait_for("message", check=check, timeout=300)
-        user_name = name_msg.content.strip()
-
-        word_to_num = {
-            "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
-            "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10
-        }
-
-        while True:
-            await member.send("How many projects are you juggling?\n(Enter a number or a word between 1 and 10, e.g. `3` or `three`)")
-            try:
-                response = await bot.wait_for("message", check=check, timeout=300)
-                num_text = response.content.strip().lower()
-                num_projects = int(num_text) if num_text.isdigit() else word_to_num[num_text]
-                break
-            except (KeyError, ValueError):
-                await member.send("❌ That wasn’t a valid number. Try again with something like `2` or `two`.")
-
-        # Set permissions
-        admin_role = discord.utils.get(guild.roles, name=ADMIN_ROLE_NAME)
-        overwrites = {
-            guild.default_role: discord.PermissionOverwrite(view_channel=True, send_messages=False),
-            member: discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_channels=True)
-        }
-        if admin_role:
-            overwrites[admin_role] = discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_channels=True)
-
-        # Create category
-        category = await guild.create_category(name=f"{user_name}'s Projects", overwrites=overwrites)
-        user_categories[member.id] = category.id
-        user_projects[member.id] = []
-
-        for i in range(1, num_projects + 1):
-            while True:
-                await member.send(f"📘 Project #{i}? Reply with: `Title, Genre, Current Word Count, Goal Word Count, Stage`")
-                msg = await bot.wait_for("message", check=check, timeout=300)
-                parts = [p.strip() for p in msg.content.split(",")]
-
-                if len(parts) < 5:
-                    await member.send("❌ I need all five details. Try again.")
-                    continue
-
-                try:
-                    title, genre, current, goal, stage = parts
-                    current_wc = int(current)
-                    goal_wc = int(goal)
-                except ValueError:
-                    await member.send("❌ Word counts must be numbers. Try again.")
-                    continue
-
-                channel = await guild.create_text_channel(name=title.lower().replace(" ", "-"), category=category)
-                tracker = await channel.send(build_tracker(title, genre, stage, current_wc, goal_wc))
-                await tracker.pin()
-                user_projects[member.id].append((channel.id, title, datetime.utcnow(), goal_wc, tracker.id, stage))
-                user_project_metadata[channel.id] = (member.id, title, genre, goal_wc)
-                break
-
-        await member.send("✅ All done! Your writing den is ready.")
-
-    except Exception as e:
-        await member.send("❌ Something went wrong while setting up your den.")
-        print(f"❌ Error in adminsetupme: {e}")
+    if not await start_intake(member, guild, "den"):
+        await member.send("⏳ Let’s finish the questions I’ve already asked you first.")
 
 
 @bot.event
+@timed("event")
 async def on_message(message):
     if message.author.bot:
         return
 
-    # Handle writing goal DM replies
-    if isinstance(message.channel, discord.DMChannel) and message.author.id in user_goals:
-        for guild in bot.guilds:
-            channel = discord.utils.get(guild.text_channels, name="weekly-writing-goals")
-            if channel:
-                now = datetime.now(pytz.timezone("Australia/Sydney")).strftime("%d %B %Y")
-                await channel.send(
-                f"📝 __**{message.author.display_name}'s Weekly Goal**__ ({now}):\n"
-                f"> {message.content}"
-                )
-                break
-        user_goals.pop(message.author.id, None)
-        await bot.process_commands(message)
-        return  # Stop here if it was a DM (don't try updating trackers)
+    # Answers to an open intake dialog
+    if isinstance(message.channel, discord.DMChannel):
+        session = find_intake(message.author.id)
+        if session is not None and session.state not in ("ready", "creating"):
+            await answer_intake(session, message)
+            await bot.process_commands(message)
+            return
+
+    # Handle writing goal DM replies: log them, and goal_digest relays them
+    if isinstance(message.channel, discord.DMChannel):
+        ts = int(time.time())
+        goal_id = store.record_goal(
+            message.author.id, goals.goal_week(ts), ts, message.author.display_name, message.content, SHARD_OWNER
+        )
+        if goal_id is not None:
+            await bot.process_commands(message)
+            return  # Stop here if it was a DM (don't try updating trackers)
 
     # Handle project tracker updates in text channels
-    if isinstance(message.channel, discord.TextChannel):
-        channel_id = message.channel.id
-        if channel_id in user_project_metadata:
-            user_id, title, genre, goal_wc = user_project_metadata[channel_id]
-            for i, (chan_id, _, _, _, tracker_id, stage) in enumerate(user_projects[user_id]):
-                if chan_id != channel_id:
-                    continue
+    project = project_registry.get(message.channel.id)
+    if project is not None and isinstance(message.channel, discord.TextChannel):
+        update = parse_update(message.content)
+        if update is not None:
+            new_wc, new_stage = update
+            if new_wc is None:
+                new_wc = await known_word_count(message.channel, project)
+            if new_stage is not None:
+                project.stage = new_stage
+            project.last_update = datetime.utcnow()
+
+            store.put_project(project)
+            schedule_inactivity(project.channel_id, project.last_update)
+            mark_board_dirty(project.guild_id, project.user_id)
+            if new_wc is None:
+                # Rendering the tracker needs a count, and a guessed one would be recorded as progress
+                print(f"⚠️ No word count known for {project.title}; its tracker is left as it was.")
+            else:
+                record_progress(project.channel_id, new_wc, project.stage)
+                queue_tracker_edit(message.channel, project.tracker_id, build_tracker(
+                    project.title, project.genre, project.stage, new_wc, project.goal_wc
+                ))
 
-                wc_match = re.search(r"Current Word Count:\s*(\d+)", message.content, re.IGNORECASE)
-                stage_match = re.search(r"Stage:\s*(.+)", message.content, re.IGNORECASE)
-                if not wc_match and not stage_match:
-                    break
+    await bot.process_commands(message)
 
-                new_wc = int(wc_match.group(1)) if wc_match else goal_wc
-                new_stage = stage_match.group(1).strip() if stage_match else stage
 
-                try:
-                    tracker_message = await message.channel.fetch_message(tracker_id)
-                    user_projects[user_id][i] = (chan_id, title, datetime.utcnow(), goal_wc, tracker_id, new_stage)
-                    await tracker_message.edit(content=build_tracker(title, genre, new_stage, new_wc, goal_wc))
-                except Exception as e:
-                    print(f"❌ Tracker update failed: {e}")
-                break
+@bot.command(name="progress")
+async def progress(ctx):
+    """Shows words written this week and current streak for each of your projects, from local history."""
+    projects = member_projects(ctx.author.id, ctx.guild.id if ctx.guild else None)
+    if not projects:
+        await ctx.send("🗂 You don’t have any projects yet. Try `!addproject`.")
+        return
 
-    await bot.process_commands(message)
+    now = int(time.time())
+    week_start = week_start_ts()
+
+    lines = [f"📈 **{ctx.author.display_name}'s progress this week**"]
+    for project in projects:
+        history = project_history.get(project.channel_id)
+        if not history:
+            lines.append(f"**{project.title}** — no updates recorded yet")
+            continue
+        lines.append(
+            f"**{project.title}** — {history.words_between(week_start, now)} words this week, "
+            f"{history.streak(now)}-day streak, {history.latest_word_count} / {project.goal_wc} ({project.stage})"
+        )
+    await ctx.send("\n".join(lines))
+
+
+@bot.command(name="trackerstats")
+@commands.has_role(ADMIN_ROLE_NAME)
+async def tracker_stats(ctx):
+    """Shows how many tracker edits were coalesced away since startup."""
+    stats = tracker_edit_stats
+    await ctx.send(
+        f"📊 Tracker updates: {stats['requested']} requested, {stats['sent']} edits sent, "
+        f"{stats['coalesced']} saved by coalescing, {stats['unchanged']} skipped as unchanged, {stats['failed']} failed, "
+        f"{len(pending_tracker_edits)} pending."
+    )
 
 
 # RUN BOT
-bot.run(os.getenv("YOUR_BOT_TOKEN"))
+def run():
+    token = os.getenv("YOUR_BOT_TOKEN")
+    if not token:
+        raise SystemExit("❌ Set YOUR_BOT_TOKEN to run the bot.")
+    bot.run(token)
+    if state_loaded:
+        # Leave a fresh snapshot behind so the next cold start skips replaying history
+        size = snapshot.write(*capture_history())
+        print(f"💾 Wrote history snapshot ({size:,} bytes)")
+        store.close()
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,221 @@
+import asyncio
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+# METRICS
+# In-process counters and latency histograms, served in Prometheus text format
+# from a small Flask app on its own thread so scrapes never touch the bot's
+# event loop.
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LOOP_LAG_INTERVAL = 0.5  # seconds between event-loop lag probes
+
+_lock = threading.Lock()
+_histograms = {}  # {(metric, labels): [bucket counts..., count, sum]}
+_counters = Counter()  # {(metric, labels): value}
+_gauges = {}  # {metric: callable returning the current value}
+_started = time.time()
+_loop_thread_id = None
+loop_lag = 0.0
+
+
+def _labels(**labels):
+    return tuple(sorted(labels.items()))
+
+
+def observe(metric, seconds, **labels):
+    key = (metric, _labels(**labels))
+    with _lock:
+        series = _histograms.get(key)
+        if series is None:
+            series = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                series[i] += 1
+        series[-2] += 1
+        series[-1] += seconds
+
+
+def inc(metric, amount=1, **labels):
+    with _lock:
+        _counters[(metric, _labels(**labels))] += amount
+
+
+def gauge(metric, read):
+    """Registers a callable sampled at scrape time, e.g. the length of a queue."""
+    _gauges[metric] = read
+
+
+def timed(kind):
+    """Records latency and errors for an event handler, command or task body."""
+    def decorator(func):
+        name = func.__name__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                inc("inkwell_handler_errors_total", kind=kind, name=name)
+                raise
+            finally:
+                observe("inkwell_handler_seconds", time.perf_counter() - started, kind=kind, name=name)
+        return wrapper
+    return decorator
+
+
+# DISCORD REST
+class _RateLimitLogHandler(logging.Handler):
+    """discord.py retries 429s itself and only reports them in its log.
+
+    Every 429 is logged as "responded with 429", and a global one is then
+    logged again as "Global rate limit", so inkwell_rest_429_total counts
+    every 429 once and inkwell_rest_global_429_total the global share of it.
+    """
+
+    def emit(self, record):
+        message = record.getMessage()
+        if "responded with 429" in message:
+            inc("inkwell_rest_429_total")
+        elif "Global rate limit" in message:
+            inc("inkwell_rest_global_429_total")
+
+
+def instrument_http(http):
+    """Counts and times every REST request made through discord.py's HTTP client."""
+    if getattr(http, "_inkwell_instrumented", False):
+        return
+    request = http.request
+
+    async def counted_request(route, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await request(route, **kwargs)
+        finally:
+            inc("inkwell_rest_requests_total", route=route.key)
+            observe("inkwell_rest_seconds", time.perf_counter() - started, route=route.key)
+
+    http.request = counted_request
+    http._inkwell_instrumented = True
+    logging.getLogger("discord.http").addHandler(_RateLimitLogHandler(logging.WARNING))
+
+
+# EVENT LOOP LAG
+async def monitor_loop_lag():
+    global loop_lag, _loop_thread_id
+    _loop_thread_id = threading.get_ident()
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        loop_lag = max(time.perf_counter() - started - LOOP_LAG_INTERVAL, 0.0)
+        observe("inkwell_event_loop_lag_seconds", loop_lag)
+
+
+# EXPOSITION
+def _format_labels(labels, **extra):
+    pairs = list(labels) + sorted(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in pairs) + "}"
+
+
+def render():
+    lines = []
+    with _lock:
+        histograms = {key: list(series) for key, series in _histograms.items()}
+        counters = dict(_counters)
+
+    by_metric = defaultdict(list)
+    for (metric, labels), value in counters.items():
+        by_metric[metric].append((labels, value))
+    for metric in sorted(by_metric):
+        lines.append(f"# TYPE {metric} counter")
+        for labels, value in sorted(by_metric[metric]):
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+    by_metric = defaultdict(list)
+    for (metric, labels), series in histograms.items():
+        by_metric[metric].append((labels, series))
+    for metric in sorted(by_metric):
+        lines.append(f"# TYPE {metric} histogram")
+        for labels, series in sorted(by_metric[metric]):
+            for bound, count in zip(BUCKETS, series):
+                lines.append(f"{metric}_bucket{_format_labels(labels, le=bound)} {count}")
+            lines.append(f"{metric}_bucket{_format_labels(labels, le='+Inf')} {series[-2]}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {series[-2]}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {series[-1]:.6f}")
+
+    gauges = dict(_gauges, inkwell_event_loop_lag_last_seconds=lambda: loop_lag,
+                  inkwell_uptime_seconds=lambda: time.time() - _started)
+    for metric in sorted(gauges):
+        try:
+            value = gauges[metric]()
+        except Exception:
+            continue
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# SAMPLING PROFILER
+def sample_stacks(seconds, interval=0.005):
+    """Samples the event loop thread's stack and returns collapsed stacks, hottest first."""
+    stacks = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(_loop_thread_id)
+        if frame is not None:
+            parts = []
+            while frame is not None:
+                code = frame.f_code
+                parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            stacks[";".join(reversed(parts))] += 1
+        time.sleep(interval)
+    return stacks.most_common()
+
+
+def start_server(is_ready, port=None, profiler=False):
+    """Serves /metrics, /healthz and optionally /debug/profile on a daemon thread."""
+    try:
+        from flask import Flask, Response, request
+    except ImportError:
+        print("⚠️ Flask isn't installed; metrics are collected but not served.")
+        return None
+
+    app = Flask("inkwell")
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        return Response(render(), mimetype="text/plain; version=0.0.4")
+
+    @app.route("/healthz")
+    def healthz():
+        healthy = is_ready() and loop_lag < 5
+        body = {"ready": is_ready(), "event_loop_lag_seconds": round(loop_lag, 4)}
+        return body, 200 if healthy else 503
+
+    if profiler:
+        @app.route("/debug/profile")
+        def profile():
+            seconds = min(float(request.args.get("seconds", 5)), 60)
+            stacks = sample_stacks(seconds)
+            text = "\n".join(f"{stack} {count}" for stack, count in stacks[:200])
+            return Response(text + "\n", mimetype="text/plain")
+
+    port = port or int(os.getenv("PORT", "8080"))
+    thread = threading.Thread(
+        target=lambda: app.run(host="0.0.0.0", port=port, threaded=True, use_reloader=False),
+        name="inkwell-metrics",
+        daemon=True,
+    )
+    thread.start()
+    print(f"📈 Metrics listening on port {port}")
+    return thread
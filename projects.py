@@ -0,0 +1,152 @@
+from datetime import datetime
+
+# PROJECT REGISTRY
+# One record per project, shared by every index, so an update changes a
+# single object in place and the per-member, per-channel and per-tracker
+# views can't drift apart. Records are written to the store as rows tagged
+# with the RECORD_VERSION they were written under; from_row reads every
+# version this code knows and refuses rows from a newer one rather than
+# guessing at their layout.
+#
+# Version 0: rows from before records were versioned, with the genre copied
+#            in from project_metadata when the store was upgraded
+# Version 1: the current layout, see ROW_COLUMNS
+
+RECORD_VERSION = 1
+ROW_COLUMNS = (
+    "channel_id", "guild_id", "user_id", "title", "genre",
+    "last_update", "goal_wc", "tracker_id", "stage", "record_version",
+)
+
+
+class Project:
+    """A member's project: its channel, pinned tracker and latest state."""
+
+    __slots__ = ("channel_id", "guild_id", "user_id", "title", "genre", "goal_wc", "tracker_id", "stage", "last_update")
+
+    def __init__(self, channel_id, guild_id, user_id, title, genre, goal_wc, tracker_id, stage, last_update):
+        self.channel_id = channel_id
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.title = title
+        self.genre = genre
+        self.goal_wc = goal_wc
+        self.tracker_id = tracker_id  # fixed once added to a registry, which indexes it
+        self.stage = stage
+        self.last_update = last_update  # naive UTC
+
+    def __repr__(self):
+        return f"<Project {self.channel_id} {self.title!r} of {self.user_id} in {self.guild_id}>"
+
+    def to_row(self):
+        """The record in ROW_COLUMNS order."""
+        return (
+            self.channel_id, self.guild_id, self.user_id, self.title, self.genre,
+            self.last_update.isoformat(), self.goal_wc, self.tracker_id, self.stage, RECORD_VERSION,
+        )
+
+    @classmethod
+    def from_row(cls, row):
+        channel_id, guild_id, user_id, title, genre, last_update, goal_wc, tracker_id, stage, version = row
+        if version > RECORD_VERSION:
+            raise ValueError(f"project {channel_id} was saved as record version {version}; this build reads up to {RECORD_VERSION}")
+        return cls(
+            channel_id, guild_id, user_id, title, genre, goal_wc, tracker_id, stage,
+            datetime.fromisoformat(last_update),
+        )
+
+
+class ProjectRegistry:
+    """Every loaded project, indexed by channel, by member and by tracker message."""
+
+    __slots__ = ("by_channel", "by_member", "by_tracker")
+
+    def __init__(self, projects=()):
+        self.by_channel = {}  # {channel_id: Project}
+        self.by_member = {}  # {guild_id: {user_id: {channel_id: Project}}}, in creation order
+        self.by_tracker = {}  # {tracker message id: Project}
+        for project in projects:
+            self.add(project)
+
+    def __len__(self):
+        return len(self.by_channel)
+
+    def __iter__(self):
+        return iter(self.by_channel.values())
+
+    def get(self, channel_id):
+        return self.by_channel.get(channel_id)
+
+    def for_tracker(self, message_id):
+        return self.by_tracker.get(message_id)
+
+    def member(self, guild_id, user_id):
+        """The member's projects in one guild, oldest first."""
+        return list(self.by_member.get(guild_id, {}).get(user_id, {}).values())
+
+    def members(self, guild_id):
+        """User IDs with projects in the guild."""
+        return self.by_member.get(guild_id, {}).keys()
+
+    def add(self, project):
+        self.remove(project.channel_id)
+        self.by_channel[project.channel_id] = project
+        self.by_member.setdefault(project.guild_id, {}).setdefault(project.user_id, {})[project.channel_id] = project
+        if project.tracker_id is not None:
+            self.by_tracker[project.tracker_id] = project
+
+    def remove(self, channel_id):
+        project = self.by_channel.pop(channel_id, None)
+        if project is None:
+            return None
+        members = self.by_member[project.guild_id]
+        owned = members[project.user_id]
+        del owned[channel_id]
+        if not owned:
+            del members[project.user_id]
+            if not members:
+                del self.by_member[project.guild_id]
+        if self.by_tracker.get(project.tracker_id) is project:
+            del self.by_tracker[project.tracker_id]
+        return project
+
+    def guild(self, guild_id):
+        """Every project in one guild."""
+        return [project for owned in self.by_member.get(guild_id, {}).values() for project in owned.values()]
+
+    def remove_guild(self, guild_id):
+        """Drops every project in the guild and returns them."""
+        removed = self.guild(guild_id)
+        for project in removed:
+            self.remove(project.channel_id)
+        return removed
+
+    def remove_member(self, guild_id, user_id):
+        """Drops every project the member has in the guild and returns them."""
+        removed = self.member(guild_id, user_id)
+        for project in removed:
+            self.remove(project.channel_id)
+        return removed
+
+
+DIFF_FIELDS = ("user_id", "title", "genre", "stage", "goal_wc", "tracker_id")
+
+
+def diff(current, rebuilt):
+    """Compares two sets of projects by channel.
+
+    Returns (added, removed, changed), where changed is [(old, new, [differing DIFF_FIELDS])].
+    """
+    current = {project.channel_id: project for project in current}
+    rebuilt = {project.channel_id: project for project in rebuilt}
+    added = [project for cid, project in rebuilt.items() if cid not in current]
+    removed = [project for cid, project in current.items() if cid not in rebuilt]
+    changed = []
+    for cid, new in rebuilt.items():
+        old = current.get(cid)
+        if old is None:
+            continue
+        fields = [field for field in DIFF_FIELDS if getattr(old, field) != getattr(new, field)]
+        if fields:
+            changed.append((old, new, fields))
+    return added, removed, changed
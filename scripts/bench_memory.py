@@ -0,0 +1,99 @@
+# Memory benchmark for in-memory project state: the registry of Project records vs the tuple layout it replaced
+# Run from the repo root: python scripts/bench_memory.py [--projects N]
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from projects import Project, ProjectRegistry
+
+GUILDS = 20
+PROJECTS_PER_USER = 4
+UPDATES = 200_000
+
+
+def rows(count):
+    """Project fields as store.load reads them: fresh objects per row, as SQLite hands them back."""
+    started = datetime(2024, 1, 1)
+    for p in range(count):
+        user = p // PROJECTS_PER_USER
+        yield (
+            10**12 + p, (1 + user % GUILDS) << 22, 10**9 + user, f"Project {p}", "Fantasy",
+            started + timedelta(minutes=p), 90000, 2 * 10**12 + p, "Drafting",
+        )
+
+
+def build_tuples(count):
+    """user_projects, user_project_metadata and channel_projects, as main.py kept them before the registry."""
+    user_projects, metadata, channel_projects = {}, {}, {}
+    for channel_id, guild_id, user_id, title, genre, last_update, goal_wc, tracker_id, stage in rows(count):
+        projects = user_projects.setdefault(guild_id, {}).setdefault(user_id, [])
+        channel_projects[channel_id] = (guild_id, user_id, len(projects))
+        projects.append((channel_id, title, last_update, goal_wc, tracker_id, stage))
+        metadata[channel_id] = (user_id, title.encode().decode(), genre, goal_wc)  # its own copy, read from another table
+    return user_projects, metadata, channel_projects
+
+
+def build_registry(count):
+    return ProjectRegistry(Project(c, g, u, t, ge, w, tr, s, lu) for c, g, u, t, ge, lu, w, tr, s in rows(count))
+
+
+# Each update returns the fields on_message renders the tracker from, as it
+# did before and after the registry: the tuples needed the genre from metadata
+def update_tuples(state, channel_ids, now):
+    user_projects, metadata, channel_projects = state
+    tracker = None
+    for channel_id in channel_ids:
+        guild_id, user_id, i = channel_projects[channel_id]
+        projects = user_projects[guild_id][user_id]
+        chan_id, title, _, goal_wc, tracker_id, stage = projects[i]
+        genre = metadata[chan_id][2]
+        projects[i] = (chan_id, title, now, goal_wc, tracker_id, "Editing")
+        tracker = (title, genre, "Editing", goal_wc)
+    return tracker
+
+
+def update_registry(registry, channel_ids, now):
+    tracker = None
+    for channel_id in channel_ids:
+        project = registry.get(channel_id)
+        project.stage = "Editing"
+        project.last_update = now
+        tracker = (project.title, project.genre, project.stage, project.goal_wc)
+    return tracker
+
+
+def measure(label, build, update, count):
+    gc.collect()
+    tracemalloc.start()
+    state = build(count)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    channel_ids = [10**12 + (i * 7919) % count for i in range(UPDATES)]
+    now = datetime.utcnow()
+    started = time.perf_counter()
+    update(state, channel_ids, now)
+    elapsed = time.perf_counter() - started
+    print(f"{label:22} {size / 2**20:9.1f} MiB {size / count:9.0f} B/project {UPDATES / elapsed:12,.0f} updates/s")
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory use of the project registry and the old tuple layout.")
+    parser.add_argument("--projects", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{args.projects:,} projects across {GUILDS} guilds, {PROJECTS_PER_USER} per member")
+    old = measure("tuples + metadata", build_tuples, update_tuples, args.projects)
+    new = measure("registry of records", build_registry, update_registry, args.projects)
+    print(f"{'saved':22} {(old - new) / 2**20:9.1f} MiB ({1 - new / old:.0%})")
+
+
+if __name__ == "__main__":
+    main()
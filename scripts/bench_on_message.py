@@ -0,0 +1,100 @@
+# Micro-benchmark for the tracker-update path in on_message
+# Run from the repo root: python scripts/bench_on_message.py
+import asyncio
+import os
+import re
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+import main
+
+GUILD_ID = 1
+USERS = 200
+PROJECTS_PER_USER = 5
+MESSAGES = 20000
+
+CHATTER = [
+    "lol same, my plot just collapsed",
+    "Anyone up for a sprint at 8? I need to get through chapter four tonight.",
+    "note to self: the villain needs a better motive",
+]
+UPDATES = [
+    "Current Word Count: 41250\nStage: Second Draft",
+    "Stage: Editing",
+    "Big day! Current Word Count: 52000",
+]
+
+
+def legacy_parse(content, projects, channel_id):
+    """The pre-parser on_message logic: enumerate the user's projects, then two inline searches."""
+    for project in projects:
+        if project.channel_id != channel_id:
+            continue
+        wc_match = re.search(r"Current Word Count:\s*(\d+)", content, re.IGNORECASE)
+        stage_match = re.search(r"Stage:\s*(.+)", content, re.IGNORECASE)
+        return wc_match, stage_match
+    return None
+
+
+def make_channel(channel_id):
+    channel = discord.TextChannel.__new__(discord.TextChannel)
+    channel.id = channel_id
+    return channel
+
+
+async def noop(message):
+    pass
+
+
+async def run():
+    main.open_store(os.path.join(tempfile.mkdtemp(), "bench.db"))  # keep the benchmark's store out of the repo
+    main.TRACKER_EDIT_DELAY = 3600
+    main.bot.process_commands = noop
+    channels = []
+    for u in range(USERS):
+        user_id = 1000 + u
+        for p in range(PROJECTS_PER_USER):
+            channel_id = 10**6 + u * 100 + p
+            main.record_project(GUILD_ID, user_id, channel_id, f"Project {p}", "Fantasy", 1000, 90000, channel_id + 1, "Drafting")
+            main.tracker_messages[channel_id] = SimpleNamespace(id=channel_id + 1)
+            channels.append(make_channel(channel_id))
+    author = SimpleNamespace(bot=False, id=1)
+
+    def messages(texts):
+        return [
+            SimpleNamespace(author=author, channel=channels[i % len(channels)], content=texts[i % len(texts)])
+            for i in range(MESSAGES)
+        ]
+
+    for label, texts in (("chatter", CHATTER), ("updates", UPDATES)):
+        batch = messages(texts)
+        started = time.perf_counter()
+        for message in batch:
+            await main.on_message(message)
+        elapsed = time.perf_counter() - started
+        print(f"on_message {label:8} {MESSAGES / elapsed:12,.0f} msg/s")
+
+    for label, texts in (("chatter", CHATTER), ("updates", UPDATES)):
+        batch = messages(texts)
+        started = time.perf_counter()
+        for message in batch:
+            main.parse_update(message.content)
+        new = time.perf_counter() - started
+        started = time.perf_counter()
+        for message in batch:
+            project = main.project_registry.get(message.channel.id)
+            legacy_parse(message.content, main.member_projects(project.user_id, project.guild_id), message.channel.id)
+        old = time.perf_counter() - started
+        print(f"parse     {label:8} {MESSAGES / new:12,.0f} msg/s  (legacy {MESSAGES / old:,.0f} msg/s)")
+
+    for task in main.tracker_edit_tasks.values():
+        task.cancel()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
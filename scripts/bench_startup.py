@@ -0,0 +1,72 @@
+# Benchmark for cold-start state loading: history replayed from the store vs the binary snapshot
+# Run from the repo root: python scripts/bench_startup.py [--projects N] [--samples N]
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import snapshot
+from store import Store
+
+GUILD_ID = 1 << 22
+STAGES = ["Outlining", "First Draft", "Second Draft", "Editing"]
+
+
+def seed(store, projects, samples):
+    now = datetime.utcnow()
+    with store.conn:
+        for p in range(projects):
+            channel_id = 10**6 + p
+            store.conn.execute(
+                "INSERT INTO projects (channel_id, guild_id, user_id, title, last_update, goal_wc, tracker_id, stage)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (channel_id, GUILD_ID, 1000 + p // 3, f"Project {p}", now.isoformat(), 90000, channel_id + 1, "Editing"),
+            )
+            store.conn.executemany(
+                "INSERT INTO progress_history (channel_id, ts, word_count, stage) VALUES (?, ?, ?, ?)",
+                ((channel_id, 1_700_000_000 + i * 3600, i * 250, STAGES[i * len(STAGES) // samples]) for i in range(samples)),
+            )
+
+
+def timed(label, func):
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:34} {elapsed * 1000:10.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare history loading from the store and from a snapshot.")
+    parser.add_argument("--projects", type=int, default=2000)
+    parser.add_argument("--samples", type=int, default=200, help="samples per project")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    store = Store(os.path.join(workdir, "bench.db"))
+    seed(store, args.projects, args.samples)
+    path = os.path.join(workdir, "bench.history")
+    print(f"{args.projects:,} projects x {args.samples:,} samples = {args.projects * args.samples:,} samples")
+
+    history = timed("load history from store", lambda: store.load_history())
+    last_rowid, epoch = store.history_marker()
+    columns = {cid: (h.times, h.counts, h.stages) for cid, h in history.items()}
+    size = timed("write snapshot", lambda: snapshot.write(path, columns, last_rowid, epoch, "None"))
+    print(f"{'snapshot size':34} {size / 1024:10.1f} KiB")
+    _, loaded = timed("read snapshot (mmap)", lambda: snapshot.read(path, epoch, "None"))
+    assert all(loaded[cid].counts == h.counts and loaded[cid].stages == h.stages for cid, h in history.items())
+
+    # A restart after a little more activity: the snapshot plus the newer rows
+    store.add_sample(10**6, 1_800_000_000, 99999, "Editing")
+    timed("read snapshot + newer rows", lambda: store.load_history(
+        after_rowid=last_rowid, history=snapshot.read(path, epoch, "None")[1]
+    ))
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
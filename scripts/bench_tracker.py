@@ -0,0 +1,50 @@
+# Benchmark for the tracker renderer against the original build_tracker
+# Run from the repo root: python scripts/bench_tracker.py
+import os
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trackers import build_tracker
+
+CALLS = 200000
+CASES = {
+    "in progress": ("Project November", "Literary Fiction", "Second Draft", 48213, 120000),
+    "complete": ("Annie & Jay", "Contemporary Romance", "Querying", 90000, 90000),
+    "over goal": ("Mazahreon", "Political Fantasy", "Chapter 12 - First Draft", 131000, 125000),
+}
+
+
+def legacy_build_tracker(name, genre, stage, current_wc, goal_wc):
+    """build_tracker as it was before the renderer, kept for comparison."""
+    try:
+        percent = round(current_wc / goal_wc * 100)
+        bar = "█" * (percent // 10) + "░" * (10 - percent // 10)
+    except (ValueError, ZeroDivisionError):
+        percent = 0
+        bar = "░" * 10
+        current_wc, goal_wc = 0, 1
+
+    return (
+        f"📌 **Progress Tracker for _{name}_**\n"
+        f"**Genre:** {genre}\n"
+        f"**Stage:** {stage}\n"
+        f"`{bar}` {percent}% complete\n"
+        f"**Word Count:** {current_wc} / {goal_wc}\n"
+        f"_Last updated: {datetime.utcnow().strftime('%Y-%m-%d')}_\n\n"
+        f"To update, even if one is the same, post both of the below in matching format:\n"
+        "`Current Word Count: [new count]`\n"
+        "`Stage: [new stage]`"
+    )
+
+
+if __name__ == "__main__":
+    for label, args in CASES.items():
+        new = min(timeit.repeat(lambda: build_tracker(*args), number=CALLS, repeat=3))
+        old = min(timeit.repeat(lambda: legacy_build_tracker(*args), number=CALLS, repeat=3))
+        print(
+            f"{label:12} renderer {CALLS / new:12,.0f}/s   legacy {CALLS / old:12,.0f}/s   "
+            f"speedup {old / new:.1f}x"
+        )
@@ -0,0 +1,295 @@
+# Offline stand-in for the Discord HTTP and gateway layers, for load tests
+#
+# The fake models subclass the real discord.py channel classes so the bot's
+# isinstance checks behave as in production. Every call that would hit the
+# REST API goes through FakeAPI, which adds latency, injects 429s and counts
+# calls by route.
+import asyncio
+import itertools
+import random
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import discord
+
+
+class FakeAPI:
+    """Simulated REST layer: latency, 429 injection and per-route call counts."""
+
+    def __init__(self, latency=0.005, jitter=0.5, rate_limit_chance=0.0, retry_after=0.05,
+                 dm_failure_chance=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_chance = rate_limit_chance
+        self.retry_after = retry_after
+        self.dm_failure_chance = dm_failure_chance
+        self.random = random.Random(seed)
+        self.calls = Counter()
+        self.rate_limited = Counter()
+        self._ids = itertools.count(int(time.time() * 1000) << 22)
+
+    def next_id(self):
+        return next(self._ids)
+
+    def reset(self):
+        self.calls.clear()
+        self.rate_limited.clear()
+
+    async def request(self, route):
+        # discord.py sleeps and retries 429s internally, so the caller just sees the delay
+        while True:
+            self.calls[route] += 1
+            await asyncio.sleep(self.latency * (1 + self.jitter * self.random.random()))
+            if self.random.random() >= self.rate_limit_chance:
+                return
+            self.rate_limited[route] += 1
+            await asyncio.sleep(self.retry_after)
+
+    def forbidden(self):
+        return discord.Forbidden(SimpleNamespace(status=403, reason="Forbidden"), "Cannot send messages to this user")
+
+
+class FakeMessage:
+    def __init__(self, api, channel, message_id, content, author=None):
+        self.api = api
+        self.channel = channel
+        self.id = message_id
+        self.content = content
+        self.author = author
+        self.pinned = False
+
+    async def fetch(self):
+        await self.api.request("fetch_message")
+        return self
+
+    async def edit(self, content=None, **kwargs):
+        await self.api.request("edit_message")
+        self.content = content
+
+    async def pin(self):
+        await self.api.request("pin_message")
+        self.pinned = True
+
+    async def delete(self):
+        await self.api.request("delete_message")
+        self.channel.messages.pop(self.id, None)
+
+
+class FakeMessageable:
+    """Message storage and partial handles shared by the fake channel types."""
+
+    def _init_messages(self, api):
+        self.api = api
+        self.messages = {}
+
+    async def send(self, content=None, **kwargs):
+        await self.api.request("send_message")
+        message = FakeMessage(self.api, self, self.api.next_id(), content, author=self.guild.gateway.bot.user)
+        self.messages[message.id] = message
+        return message
+
+    async def pins(self):
+        await self.api.request("fetch_pins")
+        return [message for message in self.messages.values() if message.pinned]
+
+    def get_partial_message(self, message_id):
+        message = self.messages.get(message_id)
+        if message is None:
+            message = self.messages[message_id] = FakeMessage(self.api, self, message_id, None)
+        return message
+
+    async def fetch_message(self, message_id):
+        await self.api.request("fetch_message")
+        return self.get_partial_message(message_id)
+
+    async def delete(self):
+        await self.api.request("delete_channel")
+        self.guild.remove_channel(self)
+
+
+class FakeTextChannel(FakeMessageable, discord.TextChannel):
+    def __init__(self, api, guild, channel_id, name, category_id=None):
+        self._init_messages(api)
+        self.guild = guild
+        self.id = channel_id
+        self.name = name
+        self.category_id = category_id
+        self.position = 0
+
+
+class FakeCategory(FakeMessageable, discord.CategoryChannel):
+    def __init__(self, api, guild, channel_id, name, overwrites=None):
+        self._init_messages(api)
+        self.guild = guild
+        self.id = channel_id
+        self.name = name
+        self.category_id = None
+        self.position = 0
+        self._fake_overwrites = dict(overwrites or {})
+
+    @property
+    def overwrites(self):
+        return self._fake_overwrites
+
+
+class FakeDMChannel(discord.DMChannel):
+    def __init__(self, channel_id, recipient):
+        self.id = channel_id
+        self.recipients = [recipient]
+        self.me = None
+
+    async def send(self, content=None, **kwargs):
+        return await self.recipients[0].send(content, **kwargs)
+
+
+class FakeMember:
+    """A guild member who answers the bot's DM questions from a script."""
+
+    def __init__(self, gateway, guild, member_id, name, replies=(), think_time=0.001):
+        self.gateway = gateway
+        self.guild = guild
+        self.id = member_id
+        self.name = name
+        self.display_name = name
+        self.mention = f"<@{member_id}>"
+        self.bot = False
+        self.replies = list(replies)
+        self.think_time = think_time
+        self.dm_channel = FakeDMChannel(gateway.api.next_id(), self)
+        self.dms = []
+        self.dm_latencies = []
+
+    async def send(self, content=None, **kwargs):
+        api = self.gateway.api
+        started = time.perf_counter()
+        await api.request("send_dm")
+        self.dm_latencies.append(time.perf_counter() - started)
+        if api.random.random() < api.dm_failure_chance:
+            raise api.forbidden()
+        self.dms.append(content)
+        # Answer questions once the bot has had a moment to record the question
+        if self.replies and "?" in (content or ""):
+            asyncio.get_running_loop().call_later(self.think_time, self.reply, self.replies.pop(0))
+
+    def reply(self, content):
+        self.gateway.dispatch_dm(self, content)
+
+
+class FakeRole:
+    def __init__(self, role_id, name):
+        self.id = role_id
+        self.name = name
+
+
+class FakeGuild:
+    def __init__(self, gateway, guild_id, name):
+        self.gateway = gateway
+        self.api = gateway.api
+        self.id = guild_id
+        self.name = name
+        self.roles = []
+        self.default_role = FakeRole(guild_id, "@everyone")
+        self.members = []
+        self.chunked = False  # as with chunk_guilds_at_startup=False
+        self._cached = set()  # IDs of members in the cache: joined this session, or all once chunked
+        self._channels = {}
+
+    @property
+    def channels(self):
+        return list(self._channels.values())
+
+    @property
+    def text_channels(self):
+        return [c for c in self._channels.values() if isinstance(c, discord.TextChannel)]
+
+    @property
+    def categories(self):
+        return [c for c in self._channels.values() if isinstance(c, discord.CategoryChannel)]
+
+    def get_channel(self, channel_id):
+        return self._channels.get(channel_id)
+
+    def get_member(self, user_id):
+        if user_id not in self._cached and not self.chunked:
+            return None
+        return next((member for member in self.members if member.id == user_id), None)
+
+    async def chunk(self):
+        await asyncio.sleep(0)
+        self.chunked = True
+
+    async def fetch_member(self, user_id):
+        await self.api.request("fetch_member")
+        member = next((member for member in self.members if member.id == user_id), None)
+        if member is None:
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Member")
+        return member
+
+    def add_channel(self, channel):
+        self._channels[channel.id] = channel
+        self.gateway.bot.dispatch("guild_channel_create", channel)
+        return channel
+
+    def remove_channel(self, channel):
+        self._channels.pop(channel.id, None)
+        self.gateway.bot.dispatch("guild_channel_delete", channel)
+
+    async def create_category(self, name, overwrites=None, **kwargs):
+        await self.api.request("create_channel")
+        return self.add_channel(FakeCategory(self.api, self, self.api.next_id(), name, overwrites))
+
+    async def create_text_channel(self, name, category=None, **kwargs):
+        await self.api.request("create_channel")
+        category_id = category.id if category else None
+        return self.add_channel(FakeTextChannel(self.api, self, self.api.next_id(), name, category_id))
+
+
+class FakeGateway:
+    """Plays the gateway's part: owns the bot's cache and delivers events to it."""
+
+    def __init__(self, bot, api):
+        self.bot = bot
+        self.api = api
+
+    async def connect(self):
+        """Stands in for login and READY: binds the bot to the running loop and sets its user."""
+        await self.bot._async_setup_hook()
+        state = self.bot._connection
+        state.user = SimpleNamespace(id=self.api.next_id(), name="Inkwell", bot=True)
+        state._guilds.clear()
+
+    def add_guild(self, name):
+        guild = FakeGuild(self, self.api.next_id(), name)
+        self.bot._connection._guilds[guild.id] = guild
+        return guild
+
+    def add_member(self, guild, name, replies=(), member_id=None, think_time=0.001, joined=False):
+        """A member of the guild; only those who joined during this session are in the member cache."""
+        member = FakeMember(self, guild, member_id or self.api.next_id(), name, replies, think_time)
+        guild.members.append(member)
+        if joined:
+            guild._cached.add(member.id)
+        self.bot._connection._users[member.id] = member
+        return member
+
+    def remove_member(self, guild, member):
+        """Dispatches a leave the way discord.py does: on_member_remove only if the member was cached."""
+        cached = guild.get_member(member.id) is not None
+        guild.members.remove(member)
+        guild._cached.discard(member.id)
+        self.bot.dispatch("raw_member_remove", SimpleNamespace(guild_id=guild.id, user=member))
+        if cached:
+            self.bot.dispatch("member_remove", member)
+
+    def dispatch_dm(self, member, content):
+        message = self.channel_message(member.dm_channel, member, content)
+        self.bot.dispatch("message", message)
+        return message
+
+    def channel_message(self, channel, member, content):
+        """An incoming message, shaped enough for the commands extension to build a context."""
+        message = FakeMessage(self.api, channel, self.api.next_id(), content, author=member)
+        message._state = self.bot._connection
+        message.guild = getattr(channel, "guild", None)
+        return message
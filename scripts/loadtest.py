@@ -0,0 +1,278 @@
+# Offline load tests for the bot's handlers against the fake Discord layer
+# Run from the repo root: python scripts/loadtest.py --help
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+import main
+from trackers import build_tracker
+from fake_discord import FakeAPI, FakeCategory, FakeGateway, FakeMessage, FakeTextChannel
+
+SCENARIOS = ("join", "storm", "broadcast", "goals", "inactivity", "rebuild", "leave")
+
+
+class Result:
+    def __init__(self, name, ops, duration, latencies, api):
+        self.name = name
+        self.ops = ops
+        self.duration = duration
+        self.latencies = sorted(latencies)
+        self.calls = dict(api.calls)
+        self.rate_limited = sum(api.rate_limited.values())
+
+    def percentile(self, p):
+        if not self.latencies:
+            return 0.0
+        return self.latencies[min(len(self.latencies) - 1, int(p / 100 * len(self.latencies)))] * 1000
+
+    def row(self):
+        return (
+            f"{self.name:12} {self.ops:8} {self.duration:9.2f} {self.ops / self.duration:10,.0f} "
+            f"{self.percentile(50):9.2f} {self.percentile(99):9.2f} {sum(self.calls.values()):10} {self.rate_limited:6}"
+        )
+
+
+async def fresh_bot(args):
+    """A connected bot with an empty store, talking to a new fake API."""
+    api = FakeAPI(latency=args.latency / 1000, rate_limit_chance=args.rate_limit,
+                  dm_failure_chance=args.dm_failures, seed=args.seed)
+    gateway = FakeGateway(main.bot, api)
+    await gateway.connect()
+    workdir = tempfile.mkdtemp()
+    main.DATA_FILE = os.path.join(workdir, "data.json")  # never import the real snapshot
+    main.open_store(os.path.join(workdir, "loadtest.db"))
+    main.load_data()
+    main.tracker_messages.clear()
+    main.last_tracker_content.clear()
+    return api, gateway
+
+
+def seed_projects(api, gateway, guild, members, projects_per_member, last_update=None):
+    """Puts members' dens straight into the fake guild and the bot's state, without API calls."""
+    channels = []
+    for member in members:
+        overwrites = {member: discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_channels=True)}
+        category = guild.add_channel(FakeCategory(api, guild, api.next_id(), f"{member.name}'s Projects", overwrites))
+        main.user_categories.setdefault(guild.id, {})[member.id] = category.id
+        for p in range(projects_per_member):
+            channel = guild.add_channel(FakeTextChannel(api, guild, api.next_id(), f"book-{p}", category.id))
+            content = build_tracker(f"Book {p}", "Fantasy", "Drafting", 1000, 80000)
+            tracker = FakeMessage(api, channel, api.next_id(), content, author=main.bot.user)
+            tracker.pinned = True
+            channel.messages[tracker.id] = tracker
+            main.record_project(guild.id, member.id, channel.id, f"Book {p}", "Fantasy", 1000, 80000, tracker.id, "Drafting")
+            channels.append((member, channel))
+    if last_update is not None:
+        for project in main.project_registry:
+            project.last_update = last_update
+        main.rebuild_inactivity_index()
+    return channels
+
+
+async def scenario_join(args):
+    api, gateway = await fresh_bot(args)
+    guild = gateway.add_guild("Join Wave")
+    main.rebuild_channel_index()
+    k = args.projects
+    members = [
+        gateway.add_member(guild, f"writer{i}", joined=True, replies=[f"Writer {i}", str(k)] + [
+            f"Book {i}-{p}, Fantasy, 1000, 80000, Drafting" for p in range(k)
+        ] + ["yes"])
+        for i in range(args.members)
+    ]
+
+    latencies = []
+
+    async def join(member):
+        # The dialog now runs from on_message, so wait for the den to be built
+        started = time.perf_counter()
+        await main.on_member_join(member)
+        while member.id in main.intake_sessions:
+            await asyncio.sleep(0.005)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(join(member) for member in members))
+    return Result("join wave", len(members), time.perf_counter() - started, latencies, api)
+
+
+async def scenario_storm(args):
+    api, gateway = await fresh_bot(args)
+    guild = gateway.add_guild("Sprint Night")
+    members = [gateway.add_member(guild, f"writer{i}") for i in range(args.members)]
+    channels = seed_projects(api, gateway, guild, members, args.projects)
+    main.rebuild_channel_index()
+    main.TRACKER_EDIT_DELAY = args.edit_delay
+    api.reset()
+
+    # A sprint: a hot tenth of the channels get every update
+    hot = channels[:max(1, len(channels) // 10)]
+    latencies = []
+    started = time.perf_counter()
+    for i in range(args.updates):
+        member, channel = hot[i % len(hot)]
+        message = gateway.channel_message(channel, member, f"Current Word Count: {1000 + i}\nStage: Drafting")
+        t = time.perf_counter()
+        await main.on_message(message)
+        latencies.append(time.perf_counter() - t)
+        if i % 100 == 0:
+            await asyncio.sleep(0)  # let in-flight edits progress as they would between gateway events
+    while main.tracker_edit_tasks:
+        await asyncio.gather(*list(main.tracker_edit_tasks.values()))
+    return Result("update storm", args.updates, time.perf_counter() - started, latencies, api)
+
+
+async def scenario_broadcast(args):
+    api, gateway = await fresh_bot(args)
+    guilds = [gateway.add_guild(f"Guild {g}") for g in range(args.guilds)]
+    # Every member is in the first guild; a third are also in the others
+    for i in range(args.members):
+        member = gateway.add_member(guilds[0], f"writer{i}")
+        if i % 3 == 0:
+            for guild in guilds[1:]:
+                guild.members.append(member)
+
+    started = time.perf_counter()
+    await main.run_goal_broadcast(f"loadtest-{time.time_ns()}")
+    duration = time.perf_counter() - started
+    latencies = [latency for member in guilds[0].members for latency in member.dm_latencies]
+    return Result("broadcast", args.members, duration, latencies, api)
+
+
+async def scenario_goals(args):
+    api, gateway = await fresh_bot(args)
+    guilds = [gateway.add_guild(f"Guild {g}") for g in range(args.guilds)]
+    for guild in guilds:
+        guild.add_channel(FakeTextChannel(api, guild, api.next_id(), main.GOAL_CHANNEL_NAME))
+    members = [gateway.add_member(guilds[i % len(guilds)], f"writer{i}") for i in range(args.members)]
+    main.rebuild_channel_index()
+    for guild in guilds:
+        await main.ensure_members(guild)  # as run_goal_broadcast does before relaying
+    for member in members:
+        main.store.add_goal_relays(member.id, main.goal_channels_for(member.id))
+    api.reset()
+
+    # Sunday afternoon: everyone replies to the prompt at once, then one digest goes out
+    latencies = []
+    started = time.perf_counter()
+    for i, member in enumerate(members):
+        message = gateway.channel_message(member.dm_channel, member, f"Finish chapter {i % 30 + 1} and outline the next.")
+        t = time.perf_counter()
+        await main.on_message(message)
+        latencies.append(time.perf_counter() - t)
+    await main.send_goal_digests()
+    return Result("goal replies", len(members), time.perf_counter() - started, latencies, api)
+
+
+async def scenario_inactivity(args):
+    api, gateway = await fresh_bot(args)
+    guild = gateway.add_guild("Quiet Season")
+    members = [gateway.add_member(guild, f"writer{i}") for i in range(args.members)]
+    # Half the members have gone quiet
+    stale = datetime.utcnow() - timedelta(days=20)
+    seed_projects(api, gateway, guild, members[: len(members) // 2], args.projects, last_update=stale)
+    seed_projects(api, gateway, guild, members[len(members) // 2:], args.projects)
+    api.reset()
+
+    started = time.perf_counter()
+    sent = await main.send_inactivity_reminders()
+    duration = time.perf_counter() - started
+    latencies = [latency for member in members for latency in member.dm_latencies]
+    return Result("inactivity", sent, duration, latencies, api)
+
+
+async def scenario_rebuild(args):
+    api, gateway = await fresh_bot(args)
+    guild = gateway.add_guild("Lost Save")
+    members = [gateway.add_member(guild, f"writer{i}") for i in range(args.members)]
+    seed_projects(api, gateway, guild, members, args.projects)
+    main.rebuild_channel_index()
+    # Lose a tenth of the projects and let another tenth fall behind their trackers
+    for i, project in enumerate(main.project_registry.guild(guild.id)):
+        if i % 10 == 0:
+            main.project_registry.remove(project.channel_id)
+        elif i % 10 == 1:
+            project.stage = "Outlining"
+    api.reset()
+
+    started = time.perf_counter()
+    rebuilt, categories, trackers, problems, scanned = await main.scan_trackers(guild)
+    lines, _ = main.rebuild_report(guild.id, rebuilt, categories, trackers)
+    main.apply_rebuild(guild.id, rebuilt, categories, trackers)
+    duration = time.perf_counter() - started
+    print(lines[0])
+    return Result("rebuild", scanned, duration, [], api)
+
+
+async def scenario_leave(args):
+    api, gateway = await fresh_bot(args)
+    guild = gateway.add_guild("Exodus")
+    # Members from before this session, so none of them are in the member cache
+    members = [gateway.add_member(guild, f"writer{i}") for i in range(args.members)]
+    seed_projects(api, gateway, guild, members, args.projects)
+    main.rebuild_channel_index()
+    api.reset()
+
+    started = time.perf_counter()
+    for member in members:
+        gateway.remove_member(guild, member)
+    while main.teardown_queue.qsize() < len(members):
+        await asyncio.sleep(0.001)
+    jobs = [main.teardown_queue.get_nowait() for _ in members]
+    await asyncio.gather(*(main.run_teardown(*job) for job in jobs))
+    duration = time.perf_counter() - started
+    left = len(guild.channels)
+    if left:
+        print(f"❌ {left} channel(s) survived the teardown")
+    return Result("leave", len(members), duration, [], api)
+
+
+async def run(args):
+    results = []
+    for name in args.scenarios:
+        scenario = globals()[f"scenario_{name}"]
+        output = io.StringIO()
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else output):
+            results.append(await scenario(args))
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Replay synthetic load against the bot's handlers offline.")
+    parser.add_argument("scenarios", nargs="*", metavar="scenario", help=f"any of {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--members", type=int, default=500)
+    parser.add_argument("--projects", type=int, default=3, help="projects per member")
+    parser.add_argument("--guilds", type=int, default=3)
+    parser.add_argument("--updates", type=int, default=5000, help="tracker updates in the storm")
+    parser.add_argument("--latency", type=float, default=5.0, help="simulated REST latency in ms")
+    parser.add_argument("--rate-limit", type=float, default=0.01, help="chance a request gets a 429")
+    parser.add_argument("--dm-failures", type=float, default=0.02, help="chance a DM is refused")
+    parser.add_argument("--edit-delay", type=float, default=0.2, help="tracker edit debounce in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="show the bot's own log output")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario: {', '.join(sorted(unknown))}")
+    args.scenarios = args.scenarios or list(SCENARIOS)
+
+    results = asyncio.run(run(args))
+    print(f"{'scenario':12} {'ops':>8} {'seconds':>9} {'ops/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'api calls':>10} {'429s':>6}")
+    for result in results:
+        print(result.row())
+    for result in results:
+        routes = ", ".join(f"{route}={count}" for route, count in sorted(result.calls.items()))
+        print(f"  {result.name}: {routes or 'no API calls'}")
+
+
+if __name__ == "__main__":
+    main_cli()
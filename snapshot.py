@@ -0,0 +1,113 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from history import ProjectHistory
+
+# HISTORY SNAPSHOT
+# Progress history is the bulk of the store, so a cold start reads it from a
+# compact binary file instead of replaying every row through SQLite. The file
+# is memory-mapped and each project's columns are copied straight into typed
+# arrays. It records the last progress_history rowid it covers and the store's
+# history epoch, so main.py can top it up with newer rows, or ignore it once
+# deletions or guild reassignments have made it stale.
+#
+# Layout (little-endian header, arrays in the writer's byte order):
+#   header   magic, version, byte order, last rowid, epoch, shard key length,
+#            stage count, project count
+#   shard key (utf-8), then each stage as a u16 length and utf-8 bytes
+#   per project: channel_id, sample count n, then n int64 times, n int64
+#   counts and n uint32 stage indexes (NO_STAGE for None)
+
+MAGIC = b"INKH"
+VERSION = 1
+HEADER = struct.Struct("<4sHBqqHII")
+PROJECT = struct.Struct("<qI")
+STAGE_LENGTH = struct.Struct("<H")
+NO_STAGE = 0xFFFFFFFF
+BYTE_ORDER = 0 if sys.byteorder == "little" else 1
+INT64 = array("q").itemsize
+INDEX = array("I").itemsize
+
+
+def encode(histories, last_rowid, epoch, shard_key):
+    """histories is {channel_id: (times, counts, stages)}; returns the snapshot bytes."""
+    stage_index = {}
+    body = []
+    for channel_id, (times, counts, stages) in histories.items():
+        indexes = array("I", (
+            NO_STAGE if stage is None else stage_index.setdefault(stage, len(stage_index))
+            for stage in stages
+        ))
+        body += [PROJECT.pack(channel_id, len(times)), times.tobytes(), counts.tobytes(), indexes.tobytes()]
+
+    key = shard_key.encode()
+    parts = [HEADER.pack(MAGIC, VERSION, BYTE_ORDER, last_rowid, epoch, len(key), len(stage_index), len(histories)), key]
+    for stage in stage_index:
+        data = stage.encode()
+        parts += [STAGE_LENGTH.pack(len(data)), data]
+    return b"".join(parts + body)
+
+
+def write(path, histories, last_rowid, epoch, shard_key):
+    """Writes the snapshot atomically, so a crash mid-write leaves the previous one intact."""
+    data = encode(histories, last_rowid, epoch, shard_key)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+def read(path, epoch, shard_key):
+    """Returns (last rowid, {channel_id: ProjectHistory}), or None if the file is missing or stale."""
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                return _decode(view, epoch, shard_key)
+            finally:
+                view.release()
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def _decode(view, epoch, shard_key):
+    magic, version, byte_order, last_rowid, snapshot_epoch, key_length, stage_count, project_count = (
+        HEADER.unpack_from(view)
+    )
+    if (magic, version, byte_order, snapshot_epoch) != (MAGIC, VERSION, BYTE_ORDER, epoch):
+        return None
+    offset = HEADER.size
+    if bytes(view[offset:offset + key_length]).decode() != shard_key:
+        return None
+    offset += key_length
+
+    stages = []
+    for _ in range(stage_count):
+        (length,) = STAGE_LENGTH.unpack_from(view, offset)
+        offset += STAGE_LENGTH.size
+        stages.append(bytes(view[offset:offset + length]).decode())
+        offset += length
+
+    histories = {}
+    for _ in range(project_count):
+        channel_id, n = PROJECT.unpack_from(view, offset)
+        offset += PROJECT.size
+        times = array("q")
+        times.frombytes(view[offset:offset + INT64 * n])
+        offset += INT64 * n
+        counts = array("q")
+        counts.frombytes(view[offset:offset + INT64 * n])
+        offset += INT64 * n
+        indexes = array("I")
+        indexes.frombytes(view[offset:offset + INDEX * n])
+        offset += INDEX * n
+        histories[channel_id] = ProjectHistory.from_columns(
+            times, counts, [None if i == NO_STAGE else stages[i] for i in indexes]
+        )
+    if offset != len(view):
+        return None
+    return last_rowid, histories
@@ -0,0 +1,663 @@
+import json
+import pathlib
+import sqlite3
+from datetime import datetime
+
+from history import ProjectHistory
+from projects import RECORD_VERSION, ROW_COLUMNS, Project, ProjectRegistry
+
+# PERSISTENT STORE
+# SQLite in WAL mode: every mutation is a small write-through record appended
+# to the WAL, and SQLite replays snapshot + WAL on open, so nothing since the
+# last manual !saveprojects is lost on restart.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    channel_id  INTEGER PRIMARY KEY,
+    guild_id    INTEGER NOT NULL DEFAULT 0,
+    user_id     INTEGER NOT NULL,
+    title       TEXT NOT NULL,
+    genre       TEXT,
+    last_update TEXT NOT NULL,
+    goal_wc     INTEGER NOT NULL,
+    tracker_id  INTEGER,
+    stage       TEXT,
+    record_version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS projects_by_member ON projects(guild_id, user_id);
+
+-- Every channel a member has been given, including past dens', so a
+-- leaving member's old channels can still be found and deleted
+CREATE TABLE IF NOT EXISTS project_metadata (
+    channel_id INTEGER PRIMARY KEY,
+    guild_id   INTEGER NOT NULL DEFAULT 0,
+    user_id    INTEGER NOT NULL,
+    title      TEXT NOT NULL,
+    genre      TEXT,
+    goal_wc    INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS metadata_by_member ON project_metadata(guild_id, user_id);
+
+CREATE TABLE IF NOT EXISTS progress_history (
+    channel_id INTEGER NOT NULL,
+    ts         INTEGER NOT NULL,
+    word_count INTEGER NOT NULL,
+    stage      TEXT
+);
+CREATE INDEX IF NOT EXISTS history_by_channel ON progress_history(channel_id, ts);
+
+CREATE TABLE IF NOT EXISTS categories (
+    guild_id    INTEGER NOT NULL DEFAULT 0,
+    user_id     INTEGER NOT NULL,
+    category_id INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS teardowns (
+    guild_id    INTEGER NOT NULL,
+    user_id     INTEGER NOT NULL,
+    category_id INTEGER,
+    channel_ids TEXT NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS broadcasts (
+    broadcast_id TEXT NOT NULL,
+    owner        TEXT NOT NULL DEFAULT '*',
+    started_at   TEXT NOT NULL,
+    finished_at  TEXT,
+    PRIMARY KEY (broadcast_id, owner)
+);
+
+CREATE TABLE IF NOT EXISTS broadcast_recipients (
+    broadcast_id TEXT NOT NULL,
+    user_id      INTEGER NOT NULL,
+    owner        TEXT NOT NULL DEFAULT '*',
+    status       TEXT NOT NULL DEFAULT 'pending',
+    PRIMARY KEY (broadcast_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS goal_relays (
+    user_id    INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    PRIMARY KEY (user_id, channel_id)
+);
+
+-- Every reply to the goal prompt, and the goal channels each is still to be relayed to
+CREATE TABLE IF NOT EXISTS goals (
+    goal_id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    week    TEXT NOT NULL,
+    ts      INTEGER NOT NULL,
+    author  TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS goals_by_user ON goals(user_id, week);
+CREATE INDEX IF NOT EXISTS goals_by_week ON goals(week, user_id);
+
+CREATE TABLE IF NOT EXISTS goal_posts (
+    goal_id    INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    owner      TEXT NOT NULL,
+    PRIMARY KEY (goal_id, channel_id)
+);
+CREATE INDEX IF NOT EXISTS goal_posts_by_owner ON goal_posts(owner, channel_id);
+
+CREATE TABLE IF NOT EXISTS intake_sessions (
+    user_id    INTEGER PRIMARY KEY,
+    guild_id   INTEGER NOT NULL,
+    kind       TEXT NOT NULL,
+    state      TEXT NOT NULL,
+    data       TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+# Stores written before state was partitioned by guild are upgraded in place.
+# Their rows get guild_id 0 until main.py works out which guild they belong to.
+UPGRADES = {
+    ("projects", "guild_id"): """
+ALTER TABLE projects ADD COLUMN guild_id INTEGER NOT NULL DEFAULT 0;
+DROP INDEX IF EXISTS projects_by_user;
+""",
+    ("projects", "record_version"): """
+ALTER TABLE projects ADD COLUMN genre TEXT;
+ALTER TABLE projects ADD COLUMN record_version INTEGER NOT NULL DEFAULT 0;
+UPDATE projects SET genre = (SELECT genre FROM project_metadata m WHERE m.channel_id = projects.channel_id);
+""",
+    ("project_metadata", "guild_id"): """
+ALTER TABLE project_metadata ADD COLUMN guild_id INTEGER NOT NULL DEFAULT 0;
+DROP INDEX IF EXISTS metadata_by_user;
+""",
+    ("categories", "guild_id"): """
+ALTER TABLE categories RENAME TO categories_old;
+CREATE TABLE categories (
+    guild_id    INTEGER NOT NULL DEFAULT 0,
+    user_id     INTEGER NOT NULL,
+    category_id INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+);
+INSERT INTO categories (guild_id, user_id, category_id) SELECT 0, user_id, category_id FROM categories_old;
+DROP TABLE categories_old;
+""",
+    ("broadcasts", "owner"): """
+ALTER TABLE broadcasts RENAME TO broadcasts_old;
+CREATE TABLE broadcasts (
+    broadcast_id TEXT NOT NULL,
+    owner        TEXT NOT NULL DEFAULT '*',
+    started_at   TEXT NOT NULL,
+    finished_at  TEXT,
+    PRIMARY KEY (broadcast_id, owner)
+);
+INSERT INTO broadcasts (broadcast_id, started_at, finished_at) SELECT broadcast_id, started_at, finished_at FROM broadcasts_old;
+DROP TABLE broadcasts_old;
+""",
+    ("broadcast_recipients", "owner"): """
+ALTER TABLE broadcast_recipients ADD COLUMN owner TEXT NOT NULL DEFAULT '*';
+""",
+}
+
+
+PUT_PROJECT = (
+    f"INSERT INTO projects ({', '.join(ROW_COLUMNS)}) VALUES ({', '.join('?' * len(ROW_COLUMNS))})"
+    " ON CONFLICT(channel_id) DO UPDATE SET "
+    + ", ".join(f"{column}=excluded.{column}" for column in ROW_COLUMNS[1:])
+)
+
+
+def shard_filter(shards, column="guild_id", guild_id=None):
+    """SQL condition selecting rows for guilds on the given (shard_ids, shard_count), or every assigned guild.
+
+    With guild_id, only that guild's rows are selected.
+    """
+    if guild_id is not None:
+        return f"{column} = ?", (guild_id,)
+    if shards is None:
+        return f"{column} != 0", ()
+    shard_ids, shard_count = shards
+    marks = ", ".join("?" * len(shard_ids))
+    return f"{column} != 0 AND ({column} >> 22) % ? IN ({marks})", (shard_count, *shard_ids)
+
+
+class Store:
+    """Write-through persistence for the project registry, user_categories and progress history."""
+
+    def __init__(self, path):
+        self.path = path
+        # Several shard processes may share one store; wait out each other's writes
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._upgrade()
+        self.conn.executescript(SCHEMA)
+
+    def _upgrade(self):
+        for (table, column), script in UPGRADES.items():
+            columns = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            if columns and column not in columns:
+                self.conn.executescript(f"BEGIN; {script} COMMIT;")
+
+    def close(self):
+        self.checkpoint()
+        self.conn.close()
+
+    def checkpoint(self):
+        # Fold the WAL back into the main database file (compaction)
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def is_empty(self):
+        row = self.conn.execute(
+            "SELECT (SELECT COUNT(*) FROM projects) + (SELECT COUNT(*) FROM project_metadata)"
+            " + (SELECT COUNT(*) FROM categories)"
+        ).fetchone()
+        return row[0] == 0
+
+    # META
+    def get_meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value))
+            )
+
+    # WRITES
+    def _put_project(self, project):
+        self.conn.execute(PUT_PROJECT, project.to_row())
+
+    def put_project(self, project):
+        with self.conn:
+            self._put_project(project)
+
+    def add_project(self, project):
+        """Writes a new project and records its channel as the member's, in one transaction."""
+        with self.conn:
+            self._put_project(project)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO project_metadata (channel_id, guild_id, user_id, title, genre, goal_wc)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (project.channel_id, project.guild_id, project.user_id, project.title, project.genre, project.goal_wc),
+            )
+
+    def add_sample(self, channel_id, ts, word_count, stage):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO progress_history (channel_id, ts, word_count, stage) VALUES (?, ?, ?, ?)",
+                (channel_id, ts, word_count, stage),
+            )
+
+    def set_category(self, guild_id, user_id, category_id):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO categories (guild_id, user_id, category_id) VALUES (?, ?, ?)",
+                (guild_id, user_id, category_id),
+            )
+
+    def _bump_history_epoch(self):
+        # Deleting samples or moving projects between guilds invalidates history snapshots
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('history_epoch', '1')"
+            " ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+    def reset_user(self, guild_id, user_id, category_id):
+        """Start a fresh den for a (re)joining member."""
+        with self.conn:
+            self._bump_history_epoch()
+            self.conn.execute(
+                "DELETE FROM progress_history WHERE channel_id IN"
+                " (SELECT channel_id FROM projects WHERE guild_id = ? AND user_id = ?)",
+                (guild_id, user_id),
+            )
+            self.conn.execute("DELETE FROM projects WHERE guild_id = ? AND user_id = ?", (guild_id, user_id))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO categories (guild_id, user_id, category_id) VALUES (?, ?, ?)",
+                (guild_id, user_id, category_id),
+            )
+
+    def _delete_user_rows(self, guild_id, user_id):
+        self._bump_history_epoch()
+        for table in ("projects", "project_metadata"):
+            self.conn.execute(
+                f"DELETE FROM progress_history WHERE channel_id IN"
+                f" (SELECT channel_id FROM {table} WHERE guild_id = ? AND user_id = ?)",
+                (guild_id, user_id),
+            )
+        for table in ("projects", "project_metadata", "categories"):
+            self.conn.execute(f"DELETE FROM {table} WHERE guild_id = ? AND user_id = ?", (guild_id, user_id))
+
+    def replace_guild_projects(self, guild_id, projects, categories):
+        """Replaces a guild's projects and dens wholesale, e.g. with state rebuilt from its trackers."""
+        with self.conn:
+            self._bump_history_epoch()
+            self.conn.execute("DELETE FROM projects WHERE guild_id = ?", (guild_id,))
+            self.conn.executemany(PUT_PROJECT, (project.to_row() for project in projects))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO project_metadata (channel_id, guild_id, user_id, title, genre, goal_wc)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                ((p.channel_id, p.guild_id, p.user_id, p.title, p.genre, p.goal_wc) for p in projects),
+            )
+            self.conn.execute("DELETE FROM categories WHERE guild_id = ?", (guild_id,))
+            self.conn.executemany(
+                "INSERT INTO categories (guild_id, user_id, category_id) VALUES (?, ?, ?)",
+                ((guild_id, user_id, category_id) for user_id, category_id in categories.items()),
+            )
+
+    # GUILD ASSIGNMENT
+    def unassigned(self):
+        """Project channels and (user_id, category_id) pairs saved before rows carried a guild."""
+        channel_ids = [row[0] for row in self.conn.execute(
+            "SELECT channel_id FROM projects WHERE guild_id = 0"
+            " UNION SELECT channel_id FROM project_metadata WHERE guild_id = 0"
+        )]
+        categories = list(self.conn.execute("SELECT user_id, category_id FROM categories WHERE guild_id = 0"))
+        return channel_ids, categories
+
+    def assign_guilds(self, channel_guilds, category_guilds):
+        """channel_guilds is {channel_id: guild_id}; category_guilds is {(user_id, category_id): guild_id}."""
+        with self.conn:
+            self._bump_history_epoch()
+            for table in ("projects", "project_metadata"):
+                self.conn.executemany(
+                    f"UPDATE {table} SET guild_id = ? WHERE channel_id = ? AND guild_id = 0",
+                    ((guild_id, channel_id) for channel_id, guild_id in channel_guilds.items()),
+                )
+            for (user_id, category_id), guild_id in category_guilds.items():
+                # A den created since the upgrade wins over the legacy row
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO categories (guild_id, user_id, category_id) VALUES (?, ?, ?)",
+                    (guild_id, user_id, category_id),
+                )
+                self.conn.execute("DELETE FROM categories WHERE guild_id = 0 AND user_id = ?", (user_id,))
+
+    # TEARDOWNS
+    def begin_teardown(self, guild_id, user_id, category_id, channel_ids):
+        """Drops the member's state and records the channels still to delete, atomically."""
+        with self.conn:
+            self._delete_user_rows(guild_id, user_id)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO teardowns (guild_id, user_id, category_id, channel_ids) VALUES (?, ?, ?, ?)",
+                (guild_id, user_id, category_id, json.dumps(list(channel_ids))),
+            )
+
+    def update_teardown(self, guild_id, user_id, category_id, channel_ids):
+        with self.conn:
+            if category_id is None and not channel_ids:
+                self.conn.execute(
+                    "DELETE FROM teardowns WHERE guild_id = ? AND user_id = ?", (guild_id, user_id)
+                )
+            else:
+                self.conn.execute(
+                    "UPDATE teardowns SET category_id = ?, channel_ids = ? WHERE guild_id = ? AND user_id = ?",
+                    (category_id, json.dumps(list(channel_ids)), guild_id, user_id),
+                )
+
+    def pending_teardowns(self, shards=None):
+        condition, params = shard_filter(shards)
+        return [
+            (guild_id, user_id, category_id, json.loads(channel_ids))
+            for guild_id, user_id, category_id, channel_ids in self.conn.execute(
+                f"SELECT guild_id, user_id, category_id, channel_ids FROM teardowns WHERE {condition}", params
+            )
+        ]
+
+    # BROADCASTS
+    # Each shard process runs its own broadcast under its owner name. A user
+    # belongs to whichever process registers them first, so members of guilds
+    # on different processes are still only messaged once.
+    def start_broadcast(self, broadcast_id, owner, user_ids):
+        """Registers this owner's run and claims its unclaimed recipients; a no-op if the run already started."""
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT OR IGNORE INTO broadcasts (broadcast_id, owner, started_at) VALUES (?, ?, ?)",
+                (broadcast_id, owner, datetime.utcnow().isoformat()),
+            )
+            if cur.rowcount:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO broadcast_recipients (broadcast_id, user_id, owner) VALUES (?, ?, ?)",
+                    ((broadcast_id, user_id, owner) for user_id in user_ids),
+                )
+
+    def broadcast_statuses(self, broadcast_id, owner):
+        return dict(self.conn.execute(
+            "SELECT user_id, status FROM broadcast_recipients WHERE broadcast_id = ? AND owner = ?",
+            (broadcast_id, owner),
+        ))
+
+    def mark_recipient(self, broadcast_id, user_id, status):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE broadcast_recipients SET status = ? WHERE broadcast_id = ? AND user_id = ?",
+                (status, broadcast_id, user_id),
+            )
+
+    def finish_broadcast(self, broadcast_id, owner):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE broadcasts SET finished_at = ? WHERE broadcast_id = ? AND owner = ?",
+                (datetime.utcnow().isoformat(), broadcast_id, owner),
+            )
+
+    def unfinished_broadcast(self, owner):
+        row = self.conn.execute(
+            "SELECT broadcast_id FROM broadcasts WHERE owner = ? AND finished_at IS NULL"
+            " ORDER BY started_at DESC LIMIT 1",
+            (owner,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def broadcast_finished(self, broadcast_id, owner):
+        row = self.conn.execute(
+            "SELECT finished_at FROM broadcasts WHERE broadcast_id = ? AND owner = ?", (broadcast_id, owner)
+        ).fetchone()
+        return bool(row and row[0])
+
+    # GOAL RELAYS
+    # Replies to the goal prompt arrive as DMs, which Discord only delivers to
+    # shard 0, so where to relay them is shared through the store.
+    def add_goal_relays(self, user_id, channel_ids):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO goal_relays (user_id, channel_id) VALUES (?, ?)",
+                ((user_id, channel_id) for channel_id in channel_ids),
+            )
+
+    # GOAL LOG
+    # Replies are logged once and queued per goal channel for the process that
+    # received them, which relays them in digests and clears them as it goes.
+    def record_goal(self, user_id, week, ts, author, content, owner):
+        """Logs a reply to the goal prompt and queues it for the channels waiting on this user.
+
+        Returns the goal's ID, or None if no goal prompt was waiting on a reply.
+        """
+        with self.conn:
+            channel_ids = [row[0] for row in self.conn.execute(
+                "SELECT channel_id FROM goal_relays WHERE user_id = ?", (user_id,)
+            )]
+            if not channel_ids:
+                return None
+            self.conn.execute("DELETE FROM goal_relays WHERE user_id = ?", (user_id,))
+            goal_id = self.conn.execute(
+                "INSERT INTO goals (user_id, week, ts, author, content) VALUES (?, ?, ?, ?, ?)",
+                (user_id, week, ts, author, content),
+            ).lastrowid
+            self.conn.executemany(
+                "INSERT INTO goal_posts (goal_id, channel_id, owner) VALUES (?, ?, ?)",
+                ((goal_id, channel_id, owner) for channel_id in channel_ids),
+            )
+        return goal_id
+
+    def pending_goal_posts(self, owner):
+        """{channel_id: [(goal_id, author, ts, content)]} still to be relayed, oldest first."""
+        pending = {}
+        for channel_id, goal_id, author, ts, content in self.conn.execute(
+            "SELECT p.channel_id, g.goal_id, g.author, g.ts, g.content FROM goal_posts p"
+            " JOIN goals g ON g.goal_id = p.goal_id WHERE p.owner = ? ORDER BY p.channel_id, g.goal_id",
+            (owner,),
+        ):
+            pending.setdefault(channel_id, []).append((goal_id, author, ts, content))
+        return pending
+
+    def finish_goal_posts(self, channel_id, goal_ids):
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM goal_posts WHERE goal_id = ? AND channel_id = ?",
+                ((goal_id, channel_id) for goal_id in goal_ids),
+            )
+
+    def goals_for_user(self, user_id, limit=10):
+        """The user's latest goals as [(week, ts, content)], newest first."""
+        return self.conn.execute(
+            "SELECT week, ts, content FROM goals WHERE user_id = ? ORDER BY week DESC, ts DESC LIMIT ?",
+            (user_id, limit),
+        ).fetchall()
+
+    def goals_for_week(self, week):
+        """Every goal set for the week as [(user_id, author, ts, content)], in the order they arrived."""
+        return self.conn.execute(
+            "SELECT user_id, author, ts, content FROM goals WHERE week = ? ORDER BY ts, goal_id",
+            (week,),
+        ).fetchall()
+
+    # DM INTAKE
+    # One row per open dialog, rewritten after every answer. Any shard process
+    # may advance a dialog, since its DMs arrive on shard 0, but only the
+    # process owning the guild builds the den.
+    def put_intake(self, row):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO intake_sessions (user_id, guild_id, kind, state, data, expires_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                row,
+            )
+
+    def get_intake(self, user_id):
+        return self.conn.execute(
+            "SELECT user_id, guild_id, kind, state, data, expires_at FROM intake_sessions WHERE user_id = ?",
+            (user_id,),
+        ).fetchone()
+
+    def delete_intake(self, user_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM intake_sessions WHERE user_id = ?", (user_id,))
+
+    def expire_intake(self, user_id, now):
+        """Deletes the dialog if it is still waiting past its deadline; True if this call expired it."""
+        with self.conn:
+            cur = self.conn.execute(
+                "DELETE FROM intake_sessions WHERE user_id = ? AND expires_at <= ? AND state NOT IN ('ready', 'creating')",
+                (user_id, now),
+            )
+        return cur.rowcount == 1
+
+    def claim_intake(self, user_id):
+        """Moves a finished dialog from ready to creating; True for the one process that gets to build it."""
+        with self.conn:
+            cur = self.conn.execute(
+                "UPDATE intake_sessions SET state = 'creating' WHERE user_id = ? AND state = 'ready'", (user_id,)
+            )
+        return cur.rowcount == 1
+
+    def intake_sessions(self, shards=None, state=None):
+        condition, params = shard_filter(shards)
+        if state is not None:
+            condition += " AND state = ?"
+            params += (state,)
+        return self.conn.execute(
+            f"SELECT user_id, guild_id, kind, state, data, expires_at FROM intake_sessions WHERE {condition}", params
+        ).fetchall()
+
+    def import_snapshot(self, data):
+        """Bulk-load a data.json style snapshot in a single transaction.
+
+        Version 1 snapshots are keyed by user alone; their rows are stored with
+        guild_id 0 until their channels are matched to a guild.
+        """
+        if data.get("version", 1) < 2:
+            data = {
+                "user_projects": {0: data.get("user_projects", {})},
+                "user_categories": {0: data.get("user_categories", {})},
+                "user_project_metadata": data.get("user_project_metadata", {}),
+            }
+        channel_guilds = {}
+        with self.conn:
+            for guild_id, members in data.get("user_projects", {}).items():
+                for user_id, projects in members.items():
+                    for channel_id, title, last_update, goal_wc, tracker_id, stage in projects:
+                        channel_guilds[int(channel_id)] = int(guild_id)
+                        self.conn.execute(
+                            "INSERT OR REPLACE INTO projects"
+                            " (channel_id, guild_id, user_id, title, last_update, goal_wc, tracker_id, stage, record_version)"
+                            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (channel_id, int(guild_id), int(user_id), title, last_update, goal_wc, tracker_id, stage,
+                             RECORD_VERSION),
+                        )
+            for channel_id, (user_id, title, genre, goal_wc) in data.get("user_project_metadata", {}).items():
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO project_metadata (channel_id, guild_id, user_id, title, genre, goal_wc)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (int(channel_id), channel_guilds.get(int(channel_id), 0), user_id, title, genre, goal_wc),
+                )
+                self.conn.execute("UPDATE projects SET genre = ? WHERE channel_id = ?", (genre, int(channel_id)))
+            for guild_id, categories in data.get("user_categories", {}).items():
+                for user_id, category_id in categories.items():
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO categories (guild_id, user_id, category_id) VALUES (?, ?, ?)",
+                        (int(guild_id), int(user_id), category_id),
+                    )
+
+    # READS
+    def load(self, shards=None, guild_id=None):
+        """Returns (ProjectRegistry, user_categories) for the given shards, or for one guild.
+
+        user_categories is partitioned by guild: {guild_id: {user_id: category_id}}.
+        """
+        condition, params = shard_filter(shards, guild_id=guild_id)
+        # Channel IDs are snowflakes, so ordering by them keeps creation order
+        registry = ProjectRegistry(
+            Project.from_row(row) for row in self.conn.execute(
+                f"SELECT {', '.join(ROW_COLUMNS)} FROM projects WHERE {condition} ORDER BY channel_id", params
+            )
+        )
+
+        user_categories = {}
+        for guild_id, user_id, category_id in self.conn.execute(
+            f"SELECT guild_id, user_id, category_id FROM categories WHERE {condition}", params
+        ):
+            user_categories.setdefault(guild_id, {})[user_id] = category_id
+
+        return registry, user_categories
+
+    def member_channels(self, shards=None, guild_id=None):
+        """{guild_id: {user_id: {channel_id}}} for every channel with metadata, including past dens."""
+        condition, params = shard_filter(shards, guild_id=guild_id)
+        channels = {}
+        for guild_id, user_id, channel_id in self.conn.execute(
+            f"SELECT guild_id, user_id, channel_id FROM project_metadata WHERE {condition}", params
+        ):
+            channels.setdefault(guild_id, {}).setdefault(user_id, set()).add(channel_id)
+        return channels
+
+    def export_rows(self, guild_id=None, user_id=None, since=None, until=None, batch=5000):
+        """Yields (guild_id, user_id, channel_id, title, genre, goal_wc, ts, word_count, stage) per history sample.
+
+        A project with no samples, such as one imported from data.json, is
+        one row with its current stage and no ts or word_count, unless a date
+        range is given. Reads on a connection of its own, so it can be
+        iterated from a worker thread while the bot keeps writing; WAL gives
+        it a consistent snapshot.
+        """
+        conditions, params = ["p.guild_id != 0"], []
+        for condition, value in (("p.guild_id = ?", guild_id), ("p.user_id = ?", user_id),
+                                 ("h.ts >= ?", since), ("h.ts <= ?", until)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        conn = sqlite3.connect(f"{pathlib.Path(self.path).resolve().as_uri()}?mode=ro", uri=True, timeout=30)
+        try:
+            cursor = conn.execute(
+                "SELECT p.guild_id, p.user_id, p.channel_id, p.title, p.genre, p.goal_wc,"
+                " h.ts, h.word_count, COALESCE(h.stage, p.stage)"
+                " FROM projects p LEFT JOIN progress_history h ON h.channel_id = p.channel_id"
+                # The order projects_by_member and then history_by_channel are walked in, so nothing is sorted
+                f" WHERE {' AND '.join(conditions)} ORDER BY p.guild_id, p.user_id, p.channel_id, h.ts",
+                params,
+            )
+            while True:
+                rows = cursor.fetchmany(batch)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            conn.close()
+
+    def history_marker(self):
+        """(last progress_history rowid, history epoch): what a history snapshot must match to be topped up."""
+        last_rowid = self.conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM progress_history").fetchone()[0]
+        return last_rowid, self.get_meta("history_epoch", 0)
+
+    def load_history(self, shards=None, after_rowid=0, history=None, guild_id=None):
+        """Returns {channel_id: ProjectHistory} for the given shards' projects, or one guild's.
+
+        With after_rowid, only samples stored after that row are read, appended
+        to the histories already in history.
+        """
+        condition, params = shard_filter(shards, "p.guild_id", guild_id)
+        history = {} if history is None else history
+        for channel_id, ts, word_count, stage in self.conn.execute(
+            "SELECT h.channel_id, h.ts, h.word_count, h.stage FROM progress_history h"
+            f" JOIN projects p ON p.channel_id = h.channel_id WHERE h.rowid > ? AND {condition}"
+            " ORDER BY h.channel_id, h.ts, h.rowid",
+            (after_rowid, *params),
+        ):
+            if channel_id not in history:
+                history[channel_id] = ProjectHistory()
+            history[channel_id].append(ts, word_count, stage)
+        return history
@@ -0,0 +1,161 @@
+import intake
+from intake import IntakeSession, TimerWheel
+
+NOW = 1_700_000_000.0
+PROJECT = "Moonfall, Fantasy, 1200, 80000, Drafting"
+DETAILS = ("Moonfall", "Fantasy", 1200, 80000, "Drafting")
+
+
+def den_at_confirm(count=2):
+    session, _ = intake.start(1, 10, "den", NOW)
+    intake.handle(session, "Ada", NOW)
+    intake.handle(session, str(count), NOW)
+    for _ in range(count):
+        intake.handle(session, PROJECT, NOW)
+    return session
+
+
+# SESSION STATE MACHINE
+def test_den_walks_through_every_question():
+    session, messages = intake.start(1, 10, "den", NOW)
+    assert session.state == "name"
+    assert messages[-1] == "What’s your name?"
+
+    assert intake.handle(session, "  Ada  ", NOW) == [intake.COUNT_PROMPT]
+    assert (session.state, session.name) == ("count", "Ada")
+
+    assert intake.handle(session, "two", NOW) == [intake.project_prompt(1)]
+    assert (session.state, session.count) == ("project", 2)
+
+    assert intake.handle(session, PROJECT, NOW) == [intake.project_prompt(2)]
+    messages = intake.handle(session, PROJECT, NOW)
+    assert session.state == "confirm"
+    assert messages == [intake.confirm_prompt(session)]
+    assert session.projects == [DETAILS, DETAILS]
+
+    assert intake.handle(session, "Yes", NOW) == []
+    assert session.state == "ready"
+
+
+def test_den_repeats_a_question_after_a_bad_answer():
+    session, _ = intake.start(1, 10, "den", NOW)
+    intake.handle(session, "Ada", NOW)
+    for bad in ("0", "11", "lots"):
+        assert intake.handle(session, bad, NOW) == [intake.COUNT_ERROR, intake.COUNT_PROMPT]
+        assert session.state == "count"
+
+    intake.handle(session, "1", NOW)
+    messages = intake.handle(session, "Moonfall, Fantasy", NOW)
+    assert messages == ["❌ I need all five details. Try again.", intake.project_prompt(1)]
+    messages = intake.handle(session, "Moonfall, Fantasy, lots, 80000, Drafting", NOW)
+    assert messages == ["❌ Word counts must be numbers. Try again.", intake.project_prompt(1)]
+    assert (session.state, session.projects) == ("project", [])
+
+
+def test_den_confirm_no_starts_the_projects_over():
+    session = den_at_confirm()
+    assert intake.handle(session, "maybe", NOW) == [intake.CONFIRM_ERROR]
+    assert session.state == "confirm"
+
+    assert intake.handle(session, "n", NOW)[-1] == intake.COUNT_PROMPT
+    assert (session.state, session.projects, session.name) == ("count", [], "Ada")
+
+
+def test_project_dialog_is_ready_or_closed_after_one_answer():
+    session, _ = intake.start(1, 10, "project", NOW)
+    assert session.state == "project"
+    assert intake.handle(session, PROJECT, NOW) == []
+    assert (session.state, session.projects) == ("ready", [DETAILS])
+
+    session, _ = intake.start(1, 10, "project", NOW)
+    messages = intake.handle(session, "Moonfall", NOW)
+    assert session.state == "closed"
+    assert "!addproject" in messages[0]
+
+
+def test_every_answer_extends_the_deadline():
+    session, _ = intake.start(1, 10, "den", NOW)
+    assert session.expires_at == NOW + intake.TIMEOUT
+    intake.handle(session, "Ada", NOW + 100)
+    assert session.expires_at == NOW + 100 + intake.TIMEOUT
+
+
+def test_session_round_trips_through_a_store_row():
+    session = den_at_confirm()
+    restored = IntakeSession.from_row(session.to_row())
+    for field in IntakeSession.__slots__:
+        assert getattr(restored, field) == getattr(session, field)
+    assert intake.handle(restored, "yes", NOW) == []
+    assert restored.state == "ready"
+
+
+# TIMER WHEEL
+def test_timer_fires_on_its_tick_and_not_before():
+    wheel = TimerWheel(tick=1, size=8)
+    wheel.advance(100)
+    wheel.schedule("a", 103.5)
+    assert wheel.advance(102) == []
+    assert wheel.advance(103) == ["a"]
+    assert len(wheel) == 0
+    assert wheel.advance(104) == []
+
+
+def test_cancel_and_reschedule():
+    wheel = TimerWheel(tick=1, size=8)
+    wheel.advance(100)
+    wheel.schedule("a", 102)
+    wheel.schedule("b", 102)
+    wheel.cancel("a")
+    wheel.schedule("b", 105)  # an answer pushed the deadline back
+    assert wheel.advance(102) == []
+    assert wheel.advance(105) == ["b"]
+
+
+def test_deadline_beyond_one_revolution_waits_for_its_lap():
+    wheel = TimerWheel(tick=1, size=8)
+    wheel.advance(100)
+    wheel.schedule("a", 120)
+    wheel.schedule("b", 112)  # same slot as "a"
+    assert wheel.advance(112) == ["b"]
+    assert wheel.advance(119) == []
+    assert wheel.advance(120) == ["a"]
+
+
+def test_overdue_deadline_is_rescheduled_for_the_next_tick():
+    wheel = TimerWheel(tick=1, size=8)
+    wheel.advance(100)
+    wheel.schedule("a", 50)  # already past, e.g. loaded from the store mid-run
+    assert wheel.deadlines["a"] == wheel.position + 1
+    assert wheel.advance(100) == []
+    assert wheel.advance(101) == ["a"]
+
+
+def test_restart_catches_up_on_overdue_deadlines():
+    # A fresh wheel has no position yet, so deadlines missed while the bot
+    # was down, even by more than a revolution, all fire on the first tick
+    wheel = TimerWheel(tick=1, size=8)
+    wheel.schedule("long gone", 10)
+    wheel.schedule("just missed", 99)
+    wheel.schedule("later", 130)
+    assert sorted(wheel.advance(100)) == ["just missed", "long gone"]
+    assert wheel.position == 100
+    assert wheel.advance(129) == []
+    assert wheel.advance(130) == ["later"]
+
+
+def test_a_long_gap_between_ticks_fires_everything_due():
+    wheel = TimerWheel(tick=1, size=8)
+    wheel.advance(100)
+    for i in range(20):
+        wheel.schedule(i, 101 + i)
+    assert sorted(wheel.advance(110)) == list(range(10))
+    assert sorted(wheel.advance(1000)) == list(range(10, 20))
+
+
+def test_clear_forgets_timers_and_position():
+    wheel = TimerWheel(tick=1, size=8)
+    wheel.advance(100)
+    wheel.schedule("a", 105)
+    wheel.clear()
+    assert len(wheel) == 0 and wheel.position is None
+    assert wheel.advance(105) == []
@@ -0,0 +1,124 @@
+import re
+import time
+
+# TRACKER UPDATE PARSER
+# on_message sees every post in every project channel, most of it chatter.
+# A substring check rejects those before any regex runs; real updates are
+# parsed in a single pass over the message.
+
+UPDATE_PATTERN = re.compile(r"current word count:\s*(\d+)|stage:\s*(.+)", re.IGNORECASE)
+WORD_COUNT_PATTERN = re.compile(r"current word count:\s*(\d+)", re.IGNORECASE)
+
+
+def parse_update(content):
+    """Returns (word_count, stage) with None for a missing field, or None if the post isn't an update."""
+    if ":" not in content:
+        return None
+    lowered = content.casefold()  # as IGNORECASE folds, so "ſtage:" counts too
+    if "word count:" not in lowered and "stage:" not in lowered:
+        return None
+
+    word_count = stage = None
+    for match in UPDATE_PATTERN.finditer(content):
+        wc_text, stage_text = match.groups()
+        if wc_text is not None:
+            if word_count is None:
+                word_count = int(wc_text)
+        else:
+            stage = stage_text.strip()
+            # Each stage runs to the end of its line and can swallow a count
+            # written after it, so look for the count from here on directly
+            if word_count is None:
+                later = WORD_COUNT_PATTERN.search(content, match.start(2))
+                if later:
+                    word_count = int(later.group(1))
+            break
+
+    if word_count is None and stage is None:
+        return None
+    return word_count, stage
+
+
+# TRACKER RENDERER
+# build_tracker runs for every tracker edit. The layout is fixed, so the
+# template, the 11 possible bars and today's date are computed once and
+# only the fields are filled in per call.
+
+BAR_WIDTH = 10
+BARS = tuple("█" * filled + "░" * (BAR_WIDTH - filled) for filled in range(BAR_WIDTH + 1))
+
+TRACKER_TEMPLATE = (
+    "📌 **Progress Tracker for _%s_**\n"
+    "**Genre:** %s\n"
+    "**Stage:** %s\n"
+    "`%s` %d%% complete\n"
+    "**Word Count:** %d / %d\n"
+    "_Last updated: %s_\n\n"
+    "To update, even if one is the same, post both of the below in matching format:\n"
+    "`Current Word Count: [new count]`\n"
+    "`Stage: [new stage]`"
+)
+
+_date_day = None
+_date_text = ""
+
+
+def today_string():
+    """UTC date as YYYY-MM-DD, reformatted only when the day rolls over."""
+    global _date_day, _date_text
+    now = time.time()
+    day = int(now // 86400)
+    if day != _date_day:
+        _date_day = day
+        _date_text = time.strftime("%Y-%m-%d", time.gmtime(now))
+    return _date_text
+
+
+def build_tracker(name, genre, stage, current_wc, goal_wc):
+    try:
+        percent = round(current_wc / goal_wc * 100)
+    except (ValueError, ZeroDivisionError):
+        percent = 0
+        current_wc, goal_wc = 0, 1
+
+    # Over 100% (or a negative count) still gets a full (or empty) bar
+    filled = percent // 10
+    bar = BARS[BAR_WIDTH if filled > BAR_WIDTH else 0 if filled < 0 else filled]
+    return TRACKER_TEMPLATE % (name, genre, stage, bar, percent, current_wc, goal_wc, today_string())
+
+
+# TRACKER READER
+# The inverse of build_tracker, for rebuilding state from pinned trackers.
+# The pattern is derived from TRACKER_TEMPLATE itself, so the two can't
+# drift apart. A goal of 0 is rendered as "0 / 1" and reads back as 1.
+
+TRACKER_FIELDS = ("title", "genre", "stage", "bar", "percent", "current_wc", "goal_wc", "updated")
+_FIELD_PATTERNS = {"bar": "[█░]*", "percent": r"-?\d+", "current_wc": r"-?\d+", "goal_wc": r"-?\d+", "updated": r"\d{4}-\d{2}-\d{2}"}
+
+
+def _tracker_pattern():
+    fields = iter(TRACKER_FIELDS)
+    pattern = ""
+    for part in re.split(r"(%[sd%])", TRACKER_TEMPLATE):
+        if part == "%%":
+            pattern += "%"
+        elif part in ("%s", "%d"):
+            name = next(fields)
+            pattern += f"(?P<{name}>{_FIELD_PATTERNS.get(name, '.*')})"
+        else:
+            pattern += re.escape(part)
+    return re.compile(pattern)
+
+
+TRACKER_PATTERN = _tracker_pattern()
+
+
+def parse_tracker(content):
+    """Returns (title, genre, stage, current_wc, goal_wc, last updated as YYYY-MM-DD), or None if content isn't a tracker."""
+    match = TRACKER_PATTERN.fullmatch(content or "")
+    if match is None:
+        return None
+    return (
+        match["title"], match["genre"], match["stage"],
+        int(match["current_wc"]), int(match["goal_wc"]), match["updated"],
+    )